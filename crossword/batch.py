@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from bitsets import BitsetCrosswordCreator
+from crossword import Crossword
+from dictionary import load_dictionary
+from generate import render
+
+# Word file of a worker process, whose dictionary it loads once
+worker_words = None
+
+
+def load_worker(words):
+    """
+    Load the dictionary of the word file `words` in a worker process.
+    """
+    global worker_words
+    worker_words = words
+    load_dictionary(words)
+
+
+def solve_structure(structure):
+    """
+    Solve the crossword in the file `structure` with the worker's words.
+
+    Return a tuple (structure, seconds, text, grid, letters), where text
+    is None if there is no solution. The grid and letters are the plain
+    lists needed to draw the solution.
+    """
+    start = time.perf_counter()
+    crossword = Crossword(structure, worker_words)
+    creator = BitsetCrosswordCreator(crossword)
+    assignment = creator.solve(mac=True)
+    elapsed = time.perf_counter() - start
+
+    if assignment is None:
+        return structure, elapsed, None, None, None
+    return (
+        structure, elapsed, creator.text(assignment),
+        crossword.structure, creator.letter_grid(assignment)
+    )
+
+
+def generate_batch(structures, words, output, workers=None, images=True):
+    """
+    Solve every crossword in the list of files `structures` with words
+    from `words`, across a pool of `workers` processes that each load
+    the dictionary once.
+
+    Each solution is written to the directory `output` as a text file
+    named after its structure file and, if `images` is True, as an image.
+    Images are drawn by a separate process so that drawing does not hold
+    up solving. Return a dict from structure file to a pair (seconds,
+    solved), in the order the crosswords were solved.
+    """
+    os.makedirs(output, exist_ok=True)
+    results = dict()
+    drawings = []
+
+    with multiprocessing.Pool(
+        workers, initializer=load_worker, initargs=(words,)
+    ) as solvers, multiprocessing.Pool(1) as renderer:
+        for structure, elapsed, text, grid, letters in solvers.imap_unordered(
+            solve_structure, structures
+        ):
+            results[structure] = (elapsed, text is not None)
+            if text is None:
+                continue
+
+            name = os.path.splitext(os.path.basename(structure))[0]
+            with open(os.path.join(output, name + ".txt"), "w") as f:
+                f.write(text + "\n")
+            if images:
+                drawings.append(renderer.apply_async(
+                    render, (grid, letters, os.path.join(output, name + ".png"))
+                ))
+
+        # Wait for the remaining images, raising any drawing error
+        for drawing in drawings:
+            drawing.get()
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Generate many crosswords from one word list."
+    )
+    parser.add_argument("words")
+    parser.add_argument("structures", nargs="+")
+    parser.add_argument("-o", "--output", default="output",
+                        help="directory for the solutions")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="solver processes (default: one per core)")
+    parser.add_argument("--no-images", action="store_true",
+                        help="only write text solutions")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = generate_batch(
+        args.structures, args.words, args.output,
+        workers=args.workers, images=not args.no_images
+    )
+    elapsed = time.perf_counter() - start
+
+    for structure, (seconds, solved) in results.items():
+        status = "solved" if solved else "no solution"
+        print(f"{structure}: {status} in {seconds:.2f} s")
+    solved = sum(solved for _, solved in results.values())
+    print(f"Solved {solved} of {len(results)} crosswords in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from collections import deque
+
+from generate import CrosswordCreator
+
+
+class BitsetCrosswordCreator(CrosswordCreator):
+
+    def __init__(self, crossword, table=None):
+        """
+        Create new CSP crossword generator whose domains are sets of
+        word IDs stored as integers.
+
+        `table` is a `dictionary.Dictionary` that numbers the words of
+        each length and indexes them by (position, letter); by default
+        the crossword's own dictionary. Each variable starts with every
+        word of its length, so domains are node consistent from the start.
+        """
+        self.crossword = crossword
+        self.table = table or crossword.dictionary
+        self.domains = {
+            var: self.table.full(var.length)
+            for var in self.crossword.variables
+        }
+        self.trail = None
+        self.histograms = None
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return self.table.decode(var.length, self.domains[var])
+
+    def value_domain(self, var, value):
+        """
+        Return the domain of `var` holding only `value`.
+        """
+        return self.table.bit(value)
+
+    def enforce_node_consistency(self):
+        """
+        Domains only ever hold words of the right length, so there is
+        nothing to remove.
+        """
+        return
+
+    def revise(self, x, y):
+        """
+        Make variable `x` arc consistent with variable `y`.
+        To do so, remove values from `self.domains[x]` for which there is no
+        possible corresponding value for `y` in `self.domains[y]`.
+
+        For every letter at the overlap, the words of `y` with that
+        letter are intersected with the domain of `y`; words of `x`
+        are kept if some letter has support. A word whose only support
+        is itself is removed, since a word can only be used once.
+
+        Return True if a revision was made to the domain of `x`; return
+        False if no revision was made.
+        """
+        overlap = self.crossword.overlaps[x, y]
+        if not overlap:
+            return False
+
+        a, b = overlap
+        index_x = self.table.postings(x.length, a)
+        index_y = self.table.postings(y.length, b)
+        domain_y = self.domains[y]
+        same_length = x.length == y.length
+
+        supported = 0
+        for letter, words_x in index_x.items():
+            words_y = index_y.get(letter, 0) & domain_y
+            if not words_y:
+                continue
+            if same_length and words_y & (words_y - 1) == 0:
+                words_x &= ~words_y
+            supported |= words_x
+
+        revised = self.domains[x] & supported
+        if revised != self.domains[x]:
+            self.set_domain(x, revised)
+            return True
+        return False
+
+    def ac3(self, arcs=None):
+        """
+        Update `self.domains` such that each variable is arc consistent.
+        If `arcs` is None, begin with initial list of all arcs in the problem.
+        Otherwise, use `arcs` as the initial list of arcs to make consistent.
+
+        Return True if arc consistency is enforced and no domains are empty;
+        return False if one or more domains end up empty.
+        """
+        if arcs is None:
+            arcs = deque(
+                (x, y)
+                for x in self.crossword.variables
+                for y in self.crossword.neighbors(x)
+            )
+        else:
+            arcs = deque(arcs)
+        queued = set(arcs)
+
+        while arcs:
+            x, y = arcs.popleft()
+            queued.discard((x, y))
+            if self.revise(x, y):
+                if not self.domains[x]:
+                    return False
+                for z in self.crossword.neighbors(x):
+                    if z != y and (z, x) not in queued:
+                        arcs.append((z, x))
+                        queued.add((z, x))
+        return True
+
+    def build_histograms(self):
+        """
+        Letter counts are read from the postings on demand, one
+        popcount per neighbor and letter, so none are kept.
+        """
+        return
+
+    def order_domain_values(self, var, assignment):
+        """
+        Return a list of values in the domain of `var`, in order by
+        the number of values they rule out for neighboring variables.
+
+        For each neighbor, the number of domain words with each letter at
+        the overlap is counted once, as the size of the intersection of
+        the domain with that letter's postings. A word then rules out
+        the rest of the neighbor's domain.
+        """
+        stats = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            a, b = self.crossword.overlaps[var, neighbor]
+            domain = self.domains[neighbor]
+            counts = {
+                letter: (domain & words).bit_count()
+                for letter, words in self.table.postings(
+                    neighbor.length, b
+                ).items()
+            }
+            stats.append((a, counts, domain.bit_count()))
+
+        def ruled_out(word):
+            return sum(size - counts.get(word[a], 0) for a, counts, size in stats)
+
+        return sorted(self.domain_words(var), key=ruled_out)
+
+    def select_unassigned_variable(self, assignment):
+        """
+        Return an unassigned variable not already part of `assignment`.
+        Choose the variable with the minimum number of remaining values
+        in its domain. If there is a tie, choose the variable with the highest
+        degree.
+        """
+        variables = [
+            variable for variable in self.crossword.variables
+            if variable not in assignment
+        ]
+        if not variables:
+            return None
+        return min(variables, key=lambda variable: (
+            self.domains[variable].bit_count(),
+            -len(self.crossword.neighbors(variable))
+        ))
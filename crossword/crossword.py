@@ -1,25 +1,32 @@
+from dictionary import load_dictionary
+
+
 class Variable():
 
     ACROSS = "across"
     DOWN = "down"
 
+    __slots__ = ("i", "j", "direction", "length", "cells", "hash_value")
+
     def __init__(self, i, j, direction, length):
         """Create a new variable with starting point, direction, and length."""
         self.i = i
         self.j = j
         self.direction = direction
         self.length = length
-        self.cells = []
-        for k in range(self.length):
-            self.cells.append(
-                (self.i + (k if self.direction == Variable.DOWN else 0),
-                 self.j + (k if self.direction == Variable.ACROSS else 0))
-            )
+        self.cells = tuple(
+            (self.i + (k if self.direction == Variable.DOWN else 0),
+             self.j + (k if self.direction == Variable.ACROSS else 0))
+            for k in range(self.length)
+        )
+        self.hash_value = hash((self.i, self.j, self.direction, self.length))
 
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self.hash_value
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (
             (self.i == other.i) and
             (self.j == other.j) and
@@ -35,6 +42,13 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Overlaps(dict):
+    """Sparse map from pairs of variables to their overlap, or None."""
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
     def __init__(self, structure_file, words_file):
@@ -57,9 +71,8 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Load vocabulary list, compiled into buckets of words by length
+        self.dictionary = load_dictionary(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -108,26 +121,33 @@ class Crossword():
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored, found through the variables
+        # passing through each cell
+        cell_variables = dict()
+        for v in self.variables:
+            for k, cell in enumerate(v.cells):
+                cell_variables.setdefault(cell, []).append((v, k))
+
+        self.overlaps = Overlaps()
+        for entries in cell_variables.values():
+            for v1, k1 in entries:
+                for v2, k2 in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+
+        # Overlapping variables of each variable, computed once
+        adjacency = {v: set() for v in self.variables}
+        for v1, v2 in self.overlaps:
+            adjacency[v1].add(v2)
+        self.adjacency = {
+            v: frozenset(neighbors) for v, neighbors in adjacency.items()
+        }
+
+    @property
+    def words(self):
+        """Set of all words in the vocabulary."""
+        return self.dictionary.words
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.adjacency[var]
@@ -0,0 +1,234 @@
+import mmap
+import os
+import struct
+
+# Every compiled dictionary starts with these bytes and a format version
+MAGIC = b"CWDC"
+VERSION = 1
+
+# Compiled dictionaries are stored next to the word file with this suffix
+SUFFIX = ".compiled"
+
+# Header after the magic bytes: version, modification time and size of
+# the word file it was compiled from, and number of word lengths
+HEADER = struct.Struct("<HqqI")
+
+# For each word length: length, number of words, offset and size of the
+# words, number of postings and offset of the posting entries
+LENGTH_ENTRY = struct.Struct("<HIQQIQ")
+
+# For each posting: position, code point of the letter, and offset of the
+# bitset of words with that letter at that position
+POSTING_ENTRY = struct.Struct("<HIQ")
+
+# Dictionaries loaded by this process, by word file
+loaded = dict()
+
+
+class Dictionary():
+
+    def __init__(self, data):
+        """
+        Read a compiled dictionary from the buffer `data`.
+
+        Only the directory of lengths is read up front. The words of each
+        length and the (position, letter) postings are decoded from the
+        buffer the first time they are needed, so a memory-mapped file
+        costs almost nothing to open.
+
+        Words are numbered within their length in sorted order, so a set
+        of words of one length is an integer whose bit `i` stands for
+        word `i`. These integers are the domains of
+        `bitsets.BitsetCrosswordCreator`.
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise Exception("Not a compiled dictionary")
+        version, self.mtime, self.size, count = HEADER.unpack_from(
+            data, len(MAGIC)
+        )
+        if version != VERSION:
+            raise Exception(f"Unsupported dictionary version {version}")
+
+        self.data = data
+        self.lengths = dict()
+        offset = len(MAGIC) + HEADER.size
+        for _ in range(count):
+            entry = LENGTH_ENTRY.unpack_from(data, offset)
+            self.lengths[entry[0]] = entry[1:]
+            offset += LENGTH_ENTRY.size
+
+        self.buckets = dict()
+        self.ids = dict()
+        self.index = dict()
+        self.all_words = None
+
+    def bucket(self, length):
+        """
+        Return the sorted list of words of length `length`.
+        """
+        if length not in self.buckets:
+            entry = self.lengths.get(length)
+            if entry is None:
+                self.buckets[length] = []
+            else:
+                count, offset, size = entry[:3]
+                text = self.data[offset:offset + size].decode("utf-8")
+                self.buckets[length] = text.split("\n") if count else []
+        return self.buckets[length]
+
+    @property
+    def words(self):
+        """
+        The set of all words.
+        """
+        if self.all_words is None:
+            self.all_words = set()
+            for length in self.lengths:
+                self.all_words.update(self.bucket(length))
+        return self.all_words
+
+    def postings(self, length, k):
+        """
+        Return the map from letter to the set of words of length
+        `length` with that letter at position `k`.
+        """
+        if (length, k) not in self.index:
+            postings = dict()
+            entry = self.lengths.get(length)
+            if entry is not None:
+                count, _, _, entries, offset = entry
+                width = (count + 7) // 8
+                for _ in range(entries):
+                    position, letter, start = POSTING_ENTRY.unpack_from(
+                        self.data, offset
+                    )
+                    offset += POSTING_ENTRY.size
+                    if position == k:
+                        postings[chr(letter)] = int.from_bytes(
+                            self.data[start:start + width], "little"
+                        )
+            self.index[length, k] = postings
+        return self.index[length, k]
+
+    def full(self, length):
+        """
+        Return the set of all words of length `length`.
+        """
+        return (1 << len(self.bucket(length))) - 1
+
+    def decode(self, length, bits):
+        """
+        Return the list of words of length `length` in the set `bits`.
+        """
+        bucket = self.bucket(length)
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(bucket[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def bit(self, word):
+        """
+        Return the set holding only `word`.
+        """
+        if len(word) not in self.ids:
+            self.ids[len(word)] = {
+                w: i for i, w in enumerate(self.bucket(len(word)))
+            }
+        return 1 << self.ids[len(word)][word]
+
+
+def compile_words(words_file):
+    """
+    Read the word file `words_file` and return its compiled dictionary
+    as bytes.
+    """
+    with open(words_file) as f:
+        words = set(f.read().upper().splitlines())
+    stat = os.stat(words_file)
+
+    buckets = dict()
+    for word in sorted(words):
+        if word:
+            buckets.setdefault(len(word), []).append(word)
+
+    # Lay out the directory first, then the words and postings
+    blobs = []
+    entries = []
+    offset = len(MAGIC) + HEADER.size + LENGTH_ENTRY.size * len(buckets)
+    for length, bucket in sorted(buckets.items()):
+        text = "\n".join(bucket).encode("utf-8")
+        words_offset = offset
+        blobs.append(text)
+        offset += len(text)
+
+        width = (len(bucket) + 7) // 8
+        bitsets = dict()
+        for i, word in enumerate(bucket):
+            for k, letter in enumerate(word):
+                bits = bitsets.get((k, letter))
+                if bits is None:
+                    bits = bitsets[k, letter] = bytearray(width)
+                bits[i >> 3] |= 1 << (i & 7)
+
+        directory = bytearray()
+        postings_offset = offset
+        offset += POSTING_ENTRY.size * len(bitsets)
+        for (k, letter), bits in sorted(bitsets.items()):
+            directory += POSTING_ENTRY.pack(k, ord(letter), offset)
+            offset += width
+        blobs.append(bytes(directory))
+        blobs.extend(bytes(bits) for _, bits in sorted(bitsets.items()))
+
+        entries.append(LENGTH_ENTRY.pack(
+            length, len(bucket), words_offset, len(text),
+            len(bitsets), postings_offset
+        ))
+
+    return b"".join(
+        [MAGIC, HEADER.pack(VERSION, stat.st_mtime_ns, stat.st_size,
+                            len(buckets))]
+        + entries + blobs
+    )
+
+
+def load_dictionary(words_file):
+    """
+    Return the dictionary of the word file `words_file`.
+
+    The compiled dictionary is kept in a file next to the word file and
+    memory-mapped. It is compiled again if it is missing or the word file
+    has changed since, and kept in memory if it cannot be written.
+    Each word file is only loaded once per process.
+    """
+    key = os.path.abspath(words_file)
+    if key in loaded:
+        return loaded[key]
+
+    stat = os.stat(words_file)
+    compiled = words_file + SUFFIX
+    dictionary = None
+    try:
+        with open(compiled, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dictionary = Dictionary(data)
+        if (dictionary.mtime, dictionary.size) != (stat.st_mtime_ns,
+                                                   stat.st_size):
+            dictionary = None
+    except Exception:
+        dictionary = None
+
+    if dictionary is None:
+        data = compile_words(words_file)
+        try:
+            temporary = f"{compiled}.{os.getpid()}"
+            with open(temporary, "wb") as f:
+                f.write(data)
+            os.replace(temporary, compiled)
+        except OSError:
+            pass
+        dictionary = Dictionary(data)
+
+    loaded[key] = dictionary
+    return dictionary
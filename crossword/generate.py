@@ -1,8 +1,12 @@
+import os
 import sys
 from collections import deque
 
 from crossword import *
 
+FONT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    "assets", "fonts", "OpenSans-Regular.ttf")
+
 
 class CrosswordCreator():
 
@@ -12,10 +16,19 @@ class CrosswordCreator():
         """
         self.crossword = crossword
         self.domains = {
-            var: self.crossword.words.copy()
+            var: set(self.crossword.dictionary.bucket(var.length))
             for var in self.crossword.variables
         }
 
+        # Previous domains of variables changed during search, most
+        # recent last, or None when changes need not be undone
+        self.trail = None
+
+        # For each variable, a map from each position where it overlaps
+        # another variable to the number of words in its domain with
+        # each letter at that position; None until first needed
+        self.histograms = None
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -32,67 +45,107 @@ class CrosswordCreator():
                 letters[i][j] = word[k]
         return letters
 
-    def print(self, assignment):
+    def text(self, assignment):
         """
-        Print crossword assignment to the terminal.
+        Return crossword assignment as text, one line per row.
         """
         letters = self.letter_grid(assignment)
+        lines = []
         for i in range(self.crossword.height):
+            line = ""
             for j in range(self.crossword.width):
                 if self.crossword.structure[i][j]:
-                    print(letters[i][j] or " ", end="")
+                    line += letters[i][j] or " "
                 else:
-                    print("█", end="")
-            print()
+                    line += "█"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def print(self, assignment):
+        """
+        Print crossword assignment to the terminal.
+        """
+        print(self.text(assignment))
 
     def save(self, assignment, filename):
         """
         Save crossword assignment to an image file.
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
+        render(self.crossword.structure, self.letter_grid(assignment), filename)
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
-        )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
+    def solve(self, mac=False):
+        """
+        Enforce node and arc consistency, and then solve the CSP.
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
+        If `mac` is True, arc consistency is also maintained during
+        the search.
+        """
+        self.enforce_node_consistency()
+        self.build_histograms()
+        if not self.ac3():
+            return None
+        if mac:
+            self.trail = []
+            try:
+                return self.backtrack_mac(dict(), set())
+            finally:
+                self.trail = None
+        return self.backtrack(dict())
 
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
+    def set_domain(self, var, domain):
+        """
+        Replace the domain of `var`, remembering the old one on the
+        trail if the search may need to restore it.
+        """
+        if self.trail is not None:
+            self.trail.append((var, self.domains[var]))
+        if self.histograms is not None:
+            self.update_histograms(var, self.domains[var], domain)
+        self.domains[var] = domain
 
-        img.save(filename)
+    def undo(self, mark):
+        """
+        Restore every domain changed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            if self.histograms is not None:
+                self.update_histograms(var, self.domains[var], domain)
+            self.domains[var] = domain
 
-    def solve(self):
+    def build_histograms(self):
         """
-        Enforce node and arc consistency, and then solve the CSP.
+        Count the letters of every domain at each overlap position.
         """
-        self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        self.histograms = dict()
+        for var in self.crossword.variables:
+            self.histograms[var] = {
+                self.crossword.overlaps[var, neighbor][0]: dict()
+                for neighbor in self.crossword.neighbors(var)
+            }
+            self.count_letters(var, self.domains[var], 1)
+
+    def update_histograms(self, var, old, new):
+        """
+        Update the letter counts of `var` for a domain change from
+        `old` to `new`, touching only the words that changed.
+        """
+        self.count_letters(var, old - new, -1)
+        self.count_letters(var, new - old, 1)
+
+    def count_letters(self, var, words, sign):
+        """
+        Add `sign` to the letter counts of `var` for each of `words`.
+        """
+        for k, counts in self.histograms[var].items():
+            for word in words:
+                counts[word[k]] = counts.get(word[k], 0) + sign
+
+    def value_domain(self, var, value):
+        """
+        Return the domain of `var` holding only `value`.
+        """
+        return {value}
 
     def enforce_node_consistency(self):
         """
@@ -138,7 +191,7 @@ class CrosswordCreator():
                 if not overlaps:
                     domains_remove.add(X)
             if domains_remove:
-                self.domains[x] = self.domains[x].difference(domains_remove)
+                self.set_domain(x, self.domains[x].difference(domains_remove))
                 revised = True
         return revised
 
@@ -212,26 +265,28 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        neighbors = self.crossword.neighbors(var) # find all neighbors of a variable
-        for variable in assignment:
-            if variable in neighbors:
-                neighbors.remove(variable)       # this makes sure, that all neighbors that already have a value are not considered
+        # find all neighbors of a variable that do not have a value yet
+        neighbors = [
+            neighbor for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        ]
 
-        result = []
-        for variable in self.domains[var]:
-            count = 0                              # keep count of the ruled out domain options
-            for neighbor in neighbors:
-                for variable2 in self.domains[neighbor]:
-                    overlap = self.crossword.overlaps[var, neighbor]
+        if self.histograms is None:
+            self.build_histograms()
 
-                    if overlap:
-                        a, b = overlap
-                        if variable[a] != variable2[b]:
-                            count += 1
-            result.append([variable, count])            # append the variable and the count of options it will eliminate on the result list
+        # a value rules out every word of a neighbor except those with the
+        # same letter at the overlap, which the neighbor's histogram counts
+        stats = []
+        for neighbor in neighbors:
+            a, b = self.crossword.overlaps[var, neighbor]
+            stats.append((
+                a, self.histograms[neighbor][b], len(self.domains[neighbor])
+            ))
+
+        def ruled_out(word):
+            return sum(size - counts.get(word[a], 0) for a, counts, size in stats)
 
-        result.sort(key=lambda x: x[1])
-        return [i[0] for i in result]
+        return sorted(self.domains[var], key=ruled_out)
 
 
     def select_unassigned_variable(self, assignment):
@@ -295,7 +350,99 @@ class CrosswordCreator():
 
         return None
 
+    def backtrack_mac(self, assignment, used):
+        """
+        Using Backtracking Search that maintains arc consistency, take as
+        input a partial assignment for the crossword and return a complete
+        assignment if possible to do so.
+
+        `used` is the set of words in `assignment`. After each tentative
+        assignment the domain of the variable shrinks to that word and
+        `ac3` runs on the arcs from its unassigned neighbors, so values
+        drawn from the remaining domains never conflict with earlier
+        assignments. Pruned domains are restored from the trail when
+        the search backs up.
+
+        If no assignment is possible, return None.
+        """
+        if len(assignment) == len(self.crossword.variables):
+            return assignment
+
+        variable = self.select_unassigned_variable(assignment)
+        arcs = [
+            (neighbor, variable)
+            for neighbor in self.crossword.neighbors(variable)
+            if neighbor not in assignment
+        ]
+
+        for value in self.order_domain_values(variable, assignment):
+            if value in used:
+                continue
+            mark = len(self.trail)
+            assignment[variable] = value
+            used.add(value)
+            self.set_domain(variable, self.value_domain(variable, value))
+            if self.ac3(arcs):
+                result = self.backtrack_mac(assignment, used)
+                if result:
+                    return result
+            self.undo(mark)
+            used.discard(value)
+            del assignment[variable]
+
+        return None
+
+
+def render(structure, letters, filename):
+    """
+    Draw a letter grid on the crossword `structure` to an image file.
+
+    Takes plain lists rather than a creator, so that it can run in a
+    separate process from the solver.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    cell_size = 100
+    cell_border = 2
+    interior_size = cell_size - 2 * cell_border
+    height = len(structure)
+    width = len(structure[0]) if structure else 0
+
+    # Create a blank canvas
+    img = Image.new(
+        "RGBA",
+        (width * cell_size, height * cell_size),
+        "black"
+    )
+    font = ImageFont.truetype(FONT, 80)
+    draw = ImageDraw.Draw(img)
+
+    for i in range(height):
+        for j in range(width):
+
+            rect = [
+                (j * cell_size + cell_border,
+                 i * cell_size + cell_border),
+                ((j + 1) * cell_size - cell_border,
+                 (i + 1) * cell_size - cell_border)
+            ]
+            if structure[i][j]:
+                draw.rectangle(rect, fill="white")
+                if letters[i][j]:
+
+                    # textsize was removed in Pillow 10
+                    if hasattr(draw, "textbbox"):
+                        _, _, w, h = draw.textbbox(
+                            (0, 0), letters[i][j], font=font
+                        )
+                    else:
+                        w, h = draw.textsize(letters[i][j], font=font)
+                    draw.text(
+                        (rect[0][0] + ((interior_size - w) / 2),
+                         rect[0][1] + ((interior_size - h) / 2) - 10),
+                        letters[i][j], fill="black", font=font
+                    )
 
+    img.save(filename)
 
 
 def main():
@@ -310,9 +457,10 @@ def main():
     output = sys.argv[3] if len(sys.argv) == 4 else None
 
     # Generate crossword
+    from bitsets import BitsetCrosswordCreator
     crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    creator = BitsetCrosswordCreator(crossword)
+    assignment = creator.solve(mac=True)
 
     # Print result
     if assignment is None:
@@ -0,0 +1,185 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from bitsets import BitsetCrosswordCreator
+from crossword import Crossword, Variable
+from generate import CrosswordCreator
+
+# Crossword and word table of a worker process, loaded once per worker
+worker_crossword = None
+worker_table = None
+
+
+class RandomizedCrosswordCreator(BitsetCrosswordCreator):
+
+    def __init__(self, crossword, table=None, seed=None, lcv=True):
+        """
+        Create a bitset crossword generator that breaks ties at random.
+
+        With `seed` None the search is the same as the deterministic
+        creator. Otherwise variables with equal domain sizes and degrees,
+        and values that rule out equally many words, are tried in an
+        order drawn from `seed`. If `lcv` is False, values are tried in
+        random order instead of least constraining first.
+        """
+        super().__init__(crossword, table)
+        self.random = random.Random(seed) if seed is not None else None
+        self.lcv = lcv
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`, shuffled if
+        the search is randomized.
+        """
+        words = super().domain_words(var)
+        if self.random is not None:
+            self.random.shuffle(words)
+        return words
+
+    def order_domain_values(self, var, assignment):
+        """
+        Return the values in the domain of `var` in the order to try them.
+        """
+        if self.lcv:
+            return super().order_domain_values(var, assignment)
+        return self.domain_words(var)
+
+    def select_unassigned_variable(self, assignment):
+        """
+        Return the unassigned variable with the fewest remaining values,
+        then the highest degree, then a random tie-break.
+        """
+        if self.random is None:
+            return super().select_unassigned_variable(assignment)
+        variables = [
+            variable for variable in self.crossword.variables
+            if variable not in assignment
+        ]
+        if not variables:
+            return None
+        return min(variables, key=lambda variable: (
+            self.domains[variable].bit_count(),
+            -len(self.crossword.neighbors(variable)),
+            self.random.random()
+        ))
+
+
+def configurations(count):
+    """
+    Return `count` solver configurations as (seed, lcv) pairs.
+
+    The first is the deterministic solver. The rest are randomized, and
+    every third orders values randomly rather than least constraining
+    first, which is cheaper per node on large dictionaries.
+    """
+    return [(None, True)] + [
+        (k, k % 3 != 0) for k in range(1, count)
+    ]
+
+
+def load_worker(structure, words):
+    """
+    Load the crossword and its word table in a worker process.
+    """
+    global worker_crossword, worker_table
+    worker_crossword = Crossword(structure, words)
+    worker_table = BitsetCrosswordCreator(worker_crossword).table
+
+
+def solve_configuration(config):
+    """
+    Solve the worker's crossword with configuration `config`.
+
+    Return the pair (config, solution), where the solution is None or
+    a list of (i, j, direction, length, word) entries, since variables
+    are rebuilt rather than pickled between processes.
+    """
+    seed, lcv = config
+    creator = RandomizedCrosswordCreator(
+        worker_crossword, worker_table, seed=seed, lcv=lcv
+    )
+    assignment = creator.solve(mac=True)
+    if assignment is None:
+        return config, None
+    return config, [
+        (var.i, var.j, var.direction, var.length, word)
+        for var, word in assignment.items()
+    ]
+
+
+def solve_portfolio(structure, words, workers=None, time_limit=60):
+    """
+    Solve the crossword in `structure` with words from `words` by running
+    one solver configuration per worker process, and return the first
+    assignment found, or None if there is no solution.
+
+    Every configuration searches completely, so the first one to finish
+    decides the answer and the remaining workers are terminated. Raise
+    TimeoutError if none finishes within `time_limit` seconds.
+    """
+    workers = workers or os.cpu_count() or 1
+    deadline = time.perf_counter() + time_limit
+
+    with multiprocessing.Pool(
+        workers, initializer=load_worker, initargs=(structure, words)
+    ) as pool:
+        results = pool.imap_unordered(
+            solve_configuration, configurations(workers)
+        )
+        try:
+            config, solution = results.next(
+                timeout=max(0, deadline - time.perf_counter())
+            )
+        except multiprocessing.TimeoutError:
+            raise TimeoutError(
+                f"no configuration finished within {time_limit} seconds"
+            )
+
+    if solution is None:
+        return None
+    return {
+        Variable(i, j, direction, length): word
+        for i, j, direction, length, word in solution
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Generate a crossword by racing several solver "
+                    "configurations across processes."
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--time-limit", type=float, default=60,
+                        help="seconds to wait for a solution")
+    args = parser.parse_args()
+
+    try:
+        assignment = solve_portfolio(
+            args.structure, args.words,
+            workers=args.workers, time_limit=args.time_limit
+        )
+    except TimeoutError:
+        print(f"No solution found in {args.time_limit:g} seconds.")
+        return
+
+    # Print result
+    crossword = Crossword(args.structure, args.words)
+    creator = CrosswordCreator(crossword)
+    if assignment is None:
+        print("No solution.")
+    else:
+        creator.print(assignment)
+        if args.output:
+            creator.save(assignment, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import numpy as np
+
+# Row and column offsets of the eight neighbors of a cell
+NEIGHBOR_ROWS = np.array([-1, -1, -1, 0, 0, 1, 1, 1])
+NEIGHBOR_COLS = np.array([-1, 0, 1, -1, 1, -1, 0, 1])
+
+
+class ArrayMinesweeper():
+    """
+    Minesweeper game representation backed by NumPy arrays,
+    with the same interface as `Minesweeper`.
+
+    Mines are sampled without replacement and every neighbor count is
+    computed once up front, so boards with millions of cells can be
+    generated and played quickly.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width and height
+        self.height = height
+        self.width = width
+        self.rng = np.random.default_rng(seed)
+
+        # Place mines on distinct cells in one draw
+        positions = self.rng.choice(height * width, size=mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+
+        # Count the mines around each cell by summing the eight shifted
+        # copies of the padded board, i.e. a 3x3 convolution
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di, dj in zip(NEIGHBOR_ROWS, NEIGHBOR_COLS):
+            self.counts += padded[1 + di:1 + di + height, 1 + dj:1 + dj + width]
+
+        # Cells uncovered so far
+        self.revealed = np.zeros((height, width), dtype=bool)
+
+        # At first, player has found no mines
+        self.mines_found = set()
+        self._mines = None
+
+    @property
+    def mines(self):
+        """
+        Set of mine cells, built on first use.
+        """
+        if self._mines is None:
+            rows, cols = np.nonzero(self.board)
+            self._mines = set(zip(rows.tolist(), cols.tolist()))
+        return self._mines
+
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            print("".join("|X" if mine else "| " for mine in self.board[i]) + "|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+    def reveal(self, cell):
+        """
+        Uncovers `cell` and, if it has no neighboring mines, the whole
+        region of zero cells around it along with that region's border.
+
+        Returns a pair of arrays (rows, cols) of the newly revealed cells,
+        which is empty if `cell` is a mine or was already revealed.
+        """
+        i, j = cell
+        if self.board[i, j] or self.revealed[i, j]:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        revealed = self.revealed.reshape(-1)
+        counts = self.counts.reshape(-1)
+        start = i * self.width + j
+        revealed[start] = True
+        found = [np.array([start])]
+
+        # Breadth-first search, one vectorized step per layer of zeros
+        frontier = found[0] if counts[start] == 0 else found[0][:0]
+        while frontier.size:
+            rows = frontier // self.width
+            cols = frontier % self.width
+            rows = (rows[:, None] + NEIGHBOR_ROWS).reshape(-1)
+            cols = (cols[:, None] + NEIGHBOR_COLS).reshape(-1)
+            inside = (
+                (rows >= 0) & (rows < self.height)
+                & (cols >= 0) & (cols < self.width)
+            )
+            neighbors = rows[inside] * self.width + cols[inside]
+            neighbors = np.unique(neighbors[~revealed[neighbors]])
+            revealed[neighbors] = True
+            found.append(neighbors)
+            frontier = neighbors[counts[neighbors] == 0]
+
+        found = np.concatenate(found)
+        return found // self.width, found % self.width
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return self.mines_found == self.mines
@@ -1,5 +1,8 @@
 import itertools
 import random
+from collections import deque
+
+from probability import MineProbability
 
 
 class Minesweeper():
@@ -91,10 +94,13 @@ class Sentence():
     and a count of the number of those cells which are mines.
     """
 
-    def __init__(self, cells, count):
+    def __init__(self, cells, count, mask=0):
         self.cells = set(cells)
         self.count = count
 
+        # Integer bitmask of `cells` over the board, kept by the AI
+        self.mask = mask
+
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
@@ -143,12 +149,15 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -156,8 +165,30 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, keyed by sentence id
+        self.knowledge = dict()
+
+        # Inverted index from a cell to the ids of sentences containing it
+        self.cell_index = dict()
+
+        # Map from (mask, count) to sentence id, so duplicates are skipped
+        self.sentence_keys = dict()
+        self.next_sentence_id = 0
+
+        # Sentences that changed and still need to be inferred from
+        self.pending = deque()
+
+        # Mine probability estimates, cached per frontier component
+        self.probability = MineProbability()
+
+    def cell_bit(self, cell):
+        """
+        Returns the bitmask with only the bit of `cell` set.
+        """
+        return 1 << (cell[0] * self.width + cell[1])
 
     def mark_mine(self, cell):
         """
@@ -165,8 +196,8 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        for sentence_id in self.cell_index.pop(cell, ()):
+            self.update_sentence(sentence_id, cell, mine=True)
 
     def mark_safe(self, cell):
         """
@@ -174,8 +205,96 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence_id in self.cell_index.pop(cell, ()):
+            self.update_sentence(sentence_id, cell, mine=False)
+
+    def add_sentence(self, cells, count, mask):
+        """
+        Adds a sentence to the knowledge base and indexes it by cell,
+        unless it is empty or already known.
+        """
+        if not cells or (mask, count) in self.sentence_keys:
+            return
+
+        sentence_id = self.next_sentence_id
+        self.next_sentence_id += 1
+
+        self.knowledge[sentence_id] = Sentence(cells, count, mask)
+        self.sentence_keys[mask, count] = sentence_id
+        for cell in cells:
+            self.cell_index.setdefault(cell, set()).add(sentence_id)
+        self.pending.append(sentence_id)
+
+    def update_sentence(self, sentence_id, cell, mine):
+        """
+        Removes `cell` from a sentence once it is known to be a mine
+        or safe. The sentence is dropped if it becomes empty or turns
+        into a duplicate of another sentence.
+
+        Assumes `cell` has already been removed from `self.cell_index`.
+        """
+        sentence = self.knowledge[sentence_id]
+        del self.sentence_keys[sentence.mask, sentence.count]
+
+        if mine:
+            sentence.mark_mine(cell)
+        else:
             sentence.mark_safe(cell)
+        sentence.mask &= ~self.cell_bit(cell)
+
+        key = (sentence.mask, sentence.count)
+        if not sentence.cells or key in self.sentence_keys:
+            del self.knowledge[sentence_id]
+            for other in sentence.cells:
+                self.cell_index[other].discard(sentence_id)
+            return
+
+        self.sentence_keys[key] = sentence_id
+        self.pending.append(sentence_id)
+
+    def infer(self):
+        """
+        Draws conclusions from every pending sentence until no new
+        knowledge can be inferred. Only sentences sharing a cell with
+        a changed sentence are examined.
+        """
+        while self.pending:
+            sentence = self.knowledge.get(self.pending.popleft())
+            if sentence is None:
+                continue
+
+            # Mark any cells that can be concluded from this sentence
+            if sentence.known_mines():
+                for cell in sentence.known_mines().copy():
+                    self.mark_mine(cell)
+                continue
+            if sentence.known_safes():
+                for cell in sentence.known_safes().copy():
+                    self.mark_safe(cell)
+                continue
+
+            # Compare against sentences that share at least one cell
+            related = set()
+            for cell in sentence.cells:
+                related.update(self.cell_index[cell])
+
+            for other_id in related:
+                other = self.knowledge[other_id]
+                common = sentence.mask & other.mask
+                if common == sentence.mask and other.mask != sentence.mask:
+                    self.add_sentence(
+                        other.cells - sentence.cells,
+                        other.count - sentence.count,
+                        other.mask ^ sentence.mask
+                    )
+                elif common == other.mask and other.mask != sentence.mask:
+                    self.add_sentence(
+                        sentence.cells - other.cells,
+                        sentence.count - other.count,
+                        sentence.mask ^ other.mask
+                    )
 
     def add_knowledge(self, cell, count):
         """
@@ -194,11 +313,13 @@ class MinesweeperAI():
         """
         #1) mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
         #2) mark the cell as safe
         self.mark_safe(cell)
 
         unchecked_cells = []
         mine_count = 0
+        mask = 0
 
         for i in range(cell[0]-1, cell[0]+2):
             for j in range(cell[1]-1, cell[1]+2):
@@ -206,24 +327,12 @@ class MinesweeperAI():
                     mine_count += 1
                 if 0 <= i < self.height and 0 <= j < self.width and (i,j) not in self.safes and (i,j) not in self.mines:
                     unchecked_cells.append((i,j))
-        #add new sentence
-        sentence_new = Sentence(unchecked_cells, count - mine_count)
-        self.knowledge.append(sentence_new)
-
-        for sentence in self.knowledge:
-            if sentence.known_mines():
-                for cell in sentence.known_mines().copy():
-                    self.mark_mine(cell)
-            if sentence.known_safes():
-                for cell in sentence.known_safes().copy():
-                    self.mark_safe(cell)
-
-        for sentence in self.knowledge:
-            if sentence_new.cells.issubset(sentence.cells) and sentence.count > 0 and sentence_new.count > 0 and sentence_new.count != sentence.count:
-                subset_new = sentence.cells.difference(sentence_new.cells)
-                sentence_new_subset = Sentence(list(subset_new), sentence.count - sentence_new.count)
-                self.knowledge.append(sentence_new_subset)
+                    mask |= self.cell_bit((i, j))
+        #3) add new sentence
+        self.add_sentence(unchecked_cells, count - mine_count, mask)
 
+        #4) and 5) infer from every sentence touched by the new information
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -234,9 +343,8 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made:
-                return cell
+        for cell in self.safe_moves:
+            return cell
         return None
 
 
@@ -257,3 +365,14 @@ class MinesweeperAI():
             return random.choice(possible_moves)
         else:
             return None
+
+    def make_probable_move(self):
+        """
+        Returns a move to make on the Minesweeper board when no safe
+        move is known: the cell that has not been chosen and is not
+        known to be a mine with the lowest probability of being a mine.
+
+        Probabilities are exact for small groups of constrained cells
+        and estimated by sampling for large ones.
+        """
+        return self.probability.choose(self)
@@ -0,0 +1,397 @@
+import math
+import random
+
+
+# Components with at most this many cells are enumerated exactly
+EXACT_CELLS = 48
+
+# Search nodes allowed for one exact enumeration before falling back
+EXACT_NODES = 20000
+
+# Number of random solutions drawn for a component that is too large,
+# and search nodes allowed for each of them
+SAMPLES = 100
+SAMPLE_NODES = 2000
+
+
+class Component():
+    """
+    Connected group of frontier cells, together with every sentence
+    that mentions them.
+    """
+
+    def __init__(self, cells, constraints):
+
+        # Cells in search order, and a map from cell to its position
+        self.cells = cells
+        self.position = {cell: k for k, cell in enumerate(cells)}
+
+        # Constraints as (positions of cells, count) pairs
+        self.constraints = [
+            ([self.position[cell] for cell in sentence_cells], count)
+            for sentence_cells, count in constraints
+        ]
+
+        # Constraints that mention each position
+        self.watch = [[] for _ in cells]
+        for c, (positions, _) in enumerate(self.constraints):
+            for k in positions:
+                self.watch[k].append(c)
+
+    def solve(self, rng):
+        """
+        Returns a dict mapping a number of mines `k` to a pair
+        `(solutions, hits)`, where `solutions` is how many consistent
+        assignments place `k` mines in the component and `hits[i]` is
+        how many of those put a mine on cell `i`.
+
+        Small components are enumerated exactly. Large ones are
+        approximated from random solutions, and may come back empty
+        if none are found.
+        """
+        if len(self.cells) <= EXACT_CELLS:
+            result = self.enumerate(EXACT_NODES)
+            if result is not None:
+                return result
+        return self.sample(rng, SAMPLES)
+
+    def enumerate(self, max_nodes):
+        """
+        Enumerates every consistent assignment of the component,
+        or returns None once more than `max_nodes` nodes are visited.
+        """
+        return self.tally(self.solutions(None, max_nodes))
+
+    def sample(self, rng, samples):
+        """
+        Approximates `enumerate` by drawing random consistent
+        assignments with randomized backtracking.
+        """
+        draws = (
+            next(self.solutions(rng, SAMPLE_NODES), None)
+            for _ in range(samples)
+        )
+        return self.tally(
+            assignment for assignment in draws if assignment is not None
+        )
+
+    def tally(self, assignments):
+        """
+        Groups assignments by their number of mines, as described in
+        `solve`. Returns None if any assignment is None.
+        """
+        n = len(self.cells)
+        result = dict()
+        for assignment in assignments:
+            if assignment is None:
+                return None
+            entry = result.setdefault(sum(assignment), [0, [0] * n])
+            entry[0] += 1
+            hits = entry[1]
+            for i in range(n):
+                hits[i] += assignment[i]
+        return {mines: tuple(entry) for mines, entry in result.items()}
+
+    def solutions(self, rng, max_nodes):
+        """
+        Generates consistent assignments of the component, as lists of
+        0 (safe) or 1 (mine) per cell, by backtracking over cells in
+        order. Values are tried in random order if `rng` is given.
+
+        Yields None and stops once more than `max_nodes` nodes are
+        visited.
+        """
+        n = len(self.cells)
+        remaining = [count for _, count in self.constraints]
+        unassigned = [len(positions) for positions, _ in self.constraints]
+        assignment = []
+        nodes = 0
+
+        def feasible(k, value):
+            for c in self.watch[k]:
+                left = remaining[c] - value
+                if left < 0 or left > unassigned[c] - 1:
+                    return False
+            return True
+
+        def apply(k, value, sign):
+            for c in self.watch[k]:
+                unassigned[c] -= sign
+                remaining[c] -= sign * value
+
+        def values():
+            return [0, 1] if rng and rng.random() < 0.5 else [1, 0]
+
+        # Each frame holds the values still to try for one cell
+        choices = [values()]
+        while choices:
+            nodes += 1
+            if nodes > max_nodes:
+                yield None
+                return
+            k = len(assignment)
+            if not choices[-1]:
+                choices.pop()
+                if assignment:
+                    apply(k - 1, assignment.pop(), -1)
+                continue
+            value = choices[-1].pop()
+            if not feasible(k, value):
+                continue
+            apply(k, value, 1)
+            assignment.append(value)
+            if k + 1 == n:
+                yield list(assignment)
+                apply(k, assignment.pop(), -1)
+            else:
+                choices.append(values())
+
+
+class MineProbability():
+    """
+    Estimates how likely each unknown cell is to be a mine, given the
+    knowledge of a MinesweeperAI.
+
+    Results are cached per frontier component, keyed by the sentences
+    in that component, so new knowledge only causes the components it
+    touches to be solved again.
+    """
+
+    def __init__(self, seed=None):
+        self.cache = dict()
+        self.rng = random.Random(seed)
+
+    def components(self, ai):
+        """
+        Splits the AI's sentences into groups connected by shared cells.
+        Returns a list of (key, sentences) pairs.
+        """
+        parent = dict()
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        sentences = list(ai.knowledge.values())
+        for sentence in sentences:
+            cells = iter(sentence.cells)
+            first = next(cells)
+            parent.setdefault(first, first)
+            for cell in cells:
+                parent.setdefault(cell, cell)
+                a, b = find(first), find(cell)
+                if a != b:
+                    parent[b] = a
+
+        groups = dict()
+        for sentence in sentences:
+            root = find(next(iter(sentence.cells)))
+            groups.setdefault(root, []).append(sentence)
+
+        return [
+            (frozenset((s.mask, s.count) for s in group), group)
+            for group in groups.values()
+        ]
+
+    def solve(self, sentences):
+        """
+        Builds and solves the component made of `sentences`.
+        Returns the component's cells in search order and its solution
+        table, as described in `Component.solve`.
+        """
+
+        # Order cells breadth-first so constraints are closed early
+        by_cell = dict()
+        for sentence in sentences:
+            for cell in sentence.cells:
+                by_cell.setdefault(cell, []).append(sentence)
+        start = min(by_cell)
+        order, seen, queue = [], {start}, [start]
+        while queue:
+            cell = queue.pop(0)
+            order.append(cell)
+            for sentence in by_cell[cell]:
+                for other in sorted(sentence.cells - seen):
+                    seen.add(other)
+                    queue.append(other)
+
+        component = Component(
+            order, [(s.cells, s.count) for s in sentences]
+        )
+        return order, component.solve(self.rng)
+
+    def probabilities(self, ai):
+        """
+        Returns a pair `(frontier, interior)`, where `frontier` maps each
+        cell mentioned by some sentence to its probability of being a
+        mine, and `interior` is the probability shared by every other
+        unknown cell.
+        """
+        cache = dict()
+        tables = []
+        for key, sentences in self.components(ai):
+            if key in self.cache:
+                cache[key] = self.cache[key]
+            elif key not in cache:
+                cache[key] = self.solve(sentences)
+            tables.append(cache[key])
+
+        # Drop entries for components that no longer exist
+        self.cache = cache
+
+        frontier_size = sum(len(cells) for cells, _ in tables)
+        unknown = ai.height * ai.width - len(ai.safes) - len(ai.mines)
+        interior_size = unknown - frontier_size
+
+        # Distribution of mines in each component, as lists indexed by k
+        dists = []
+        for cells, table in tables:
+            total = sum(solutions for solutions, _ in table.values())
+            dist = [0.0] * (len(cells) + 1)
+            for mines, (solutions, _) in table.items():
+                dist[mines] = solutions / total if total else 0.0
+            dists.append(dist)
+
+        weights = None
+        if ai.total_mines is not None:
+            weights = self.interior_weights(
+                ai.total_mines - len(ai.mines), interior_size,
+                frontier_size
+            )
+
+        frontier = dict()
+        if weights is not None:
+            prefix = [[1.0]]
+            for dist in dists:
+                prefix.append(convolve(prefix[-1], dist))
+            suffix = [[1.0]]
+            for dist in reversed(dists):
+                suffix.append(convolve(suffix[-1], dist))
+            suffix.reverse()
+
+            everything = prefix[-1]
+            norm = sum(p * weights[k] for k, p in enumerate(everything))
+
+        if weights is not None and norm > 0:
+            for c, (cells, table) in enumerate(tables):
+
+                # Weight of each mine count in this component, summed
+                # over the mine counts of every other component
+                others = convolve(prefix[c], suffix[c + 1])
+                factor = dict()
+                for mines in table:
+                    factor[mines] = sum(
+                        p * weights[mines + j] for j, p in enumerate(others)
+                    )
+
+                total = sum(solutions for solutions, _ in table.values())
+                for i, cell in enumerate(cells):
+                    hits = sum(
+                        table[mines][1][i] * factor[mines]
+                        for mines in table
+                    )
+                    frontier[cell] = hits / total / norm
+
+            expected = sum(
+                p * weights[k] * (ai.total_mines - len(ai.mines) - k)
+                for k, p in enumerate(everything)
+            ) / norm
+            interior = expected / interior_size if interior_size else 1.0
+
+        else:
+
+            # Without a usable mine total, treat components independently
+            for cells, table in tables:
+                total = sum(solutions for solutions, _ in table.values())
+                for i, cell in enumerate(cells):
+                    hits = sum(entry[1][i] for entry in table.values())
+                    frontier[cell] = hits / total if total else 0.5
+            if frontier:
+                interior = sum(frontier.values()) / len(frontier)
+            else:
+                interior = 0.5
+
+        return frontier, interior
+
+    def interior_weights(self, mines_left, interior_size, frontier_size):
+        """
+        Returns a list mapping the number of mines `k` on the frontier
+        to the relative number of ways the remaining `mines_left - k`
+        mines fit in the interior cells, or None if no count fits.
+        """
+        logs = [
+            log_comb(interior_size, mines_left - k)
+            if 0 <= mines_left - k <= interior_size else None
+            for k in range(frontier_size + 1)
+        ]
+        valid = [value for value in logs if value is not None]
+        if not valid:
+            return None
+        best = max(valid)
+        return [
+            math.exp(value - best) if value is not None else 0.0
+            for value in logs
+        ]
+
+    def choose(self, ai):
+        """
+        Returns the unknown cell least likely to be a mine,
+        or None if every cell is known.
+        """
+        frontier, interior = self.probabilities(ai)
+
+        best = None
+        if frontier:
+            best = min(frontier, key=lambda cell: (frontier[cell], cell))
+
+        if best is None or interior < frontier[best]:
+            cell = self.interior_cell(ai, frontier)
+            if cell is not None:
+                return cell
+        return best
+
+    def interior_cell(self, ai, frontier):
+        """
+        Returns a random unknown cell that is not on the frontier,
+        or None if there is no such cell.
+        """
+        def unknown(cell):
+            return (
+                cell not in ai.safes and cell not in ai.mines
+                and cell not in frontier
+            )
+
+        # Random probes are enough while most of the board is unknown
+        for _ in range(32):
+            cell = (
+                self.rng.randrange(ai.height), self.rng.randrange(ai.width)
+            )
+            if unknown(cell):
+                return cell
+
+        cells = [
+            (i, j) for i in range(ai.height) for j in range(ai.width)
+            if unknown((i, j))
+        ]
+        return self.rng.choice(cells) if cells else None
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the sum of two independent mine counts.
+    """
+    result = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def log_comb(n, k):
+    """
+    Returns the natural logarithm of `n` choose `k`.
+    """
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
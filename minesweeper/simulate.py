@@ -0,0 +1,204 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from board import ArrayMinesweeper
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Games handed to a worker at a time
+CHUNK_SIZE = 100
+
+# Latencies are kept in buckets this many times wider than the last,
+# so memory stays bounded however many moves are played
+BUCKET_RATIO = 1.02
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games between the AI and the board, "
+                    "without a display."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=None,
+                        help="number of mines (default: from --density)")
+    parser.add_argument("--density", type=float, default=0.125,
+                        help="fraction of cells that are mines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--random-guess", action="store_true",
+                        help="guess uniformly instead of by probability")
+    parser.add_argument("--array-board", action="store_true",
+                        help="use the NumPy-backed board")
+    args = parser.parse_args()
+
+    mines = args.mines
+    if mines is None:
+        mines = round(args.density * args.height * args.width)
+
+    stats = simulate(
+        args.games, args.height, args.width, mines,
+        seed=args.seed, workers=args.workers,
+        random_guess=args.random_guess, array_board=args.array_board
+    )
+
+    print(f"Games: {stats['games']}")
+    print(f"Win rate: {100 * stats['win_rate']:.2f}%")
+    print(f"Games per second: {stats['games_per_second']:.1f}")
+    print(f"Moves per second: {stats['moves_per_second']:.1f}")
+    for name in ("p50", "p90", "p99", "max"):
+        print(f"Move latency {name}: {stats[name] / 1000:.1f} us")
+
+
+def simulate(games, height, width, mines, seed=0, workers=None,
+             random_guess=False, array_board=False):
+    """
+    Play `games` games across a pool of `workers` processes and return a
+    dict of statistics: win rate, games and moves per second, and
+    percentiles of the time the AI takes per move, in nanoseconds.
+
+    Game `k` is seeded with `seed + k`, so results are reproducible
+    regardless of the number of workers.
+    """
+    chunks = [
+        (start, min(CHUNK_SIZE, games - start), height, width, mines,
+         seed, random_guess, array_board)
+        for start in range(0, games, CHUNK_SIZE)
+    ]
+
+    start = time.perf_counter()
+    if workers == 1:
+        totals = merge(map(play_chunk, chunks))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            totals = merge(pool.imap_unordered(play_chunk, chunks))
+    elapsed = time.perf_counter() - start
+
+    wins, moves, histogram = totals
+    stats = {
+        "games": games,
+        "win_rate": wins / games if games else 0.0,
+        "games_per_second": games / elapsed,
+        "moves_per_second": moves / elapsed,
+    }
+    stats.update(percentiles(histogram, moves))
+    return stats
+
+
+def play_chunk(chunk):
+    """
+    Play one chunk of games. Returns a tuple (wins, moves, histogram),
+    where `histogram` maps a latency bucket to a number of moves.
+    """
+    start, count, height, width, mines, seed, random_guess, array_board = (
+        chunk
+    )
+    wins = 0
+    moves = 0
+    histogram = dict()
+    for k in range(start, start + count):
+        won, latencies = play_game(
+            height, width, mines, seed + k, random_guess, array_board
+        )
+        wins += won
+        moves += len(latencies)
+        for latency in latencies:
+            bucket = latency_bucket(latency)
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+    return wins, moves, histogram
+
+
+def play_game(height, width, mines, seed, random_guess=False,
+              array_board=False):
+    """
+    Let the AI play a single game until it wins or hits a mine.
+    Returns a tuple (won, latencies), where `latencies` lists the
+    nanoseconds the AI needed for each move.
+    """
+    rng = random.Random(seed)
+    if array_board:
+        game = ArrayMinesweeper(
+            height=height, width=width, mines=mines, seed=seed
+        )
+    else:
+        random.seed(rng.random())
+        game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    ai.probability.rng.seed(rng.random())
+
+    safe_cells = height * width - mines
+    latencies = []
+    move = None
+    nearby = None
+    while True:
+
+        # Time the AI's update from the last move plus its next choice
+        begin = time.perf_counter_ns()
+        if move is not None:
+            ai.add_knowledge(move, nearby)
+        move = ai.make_safe_move()
+        if move is None:
+            if random_guess:
+                move = ai.make_random_move()
+            else:
+                move = ai.make_probable_move()
+        latencies.append(time.perf_counter_ns() - begin)
+
+        if move is None:
+            return ai.mines == game.mines, latencies
+        if game.is_mine(move):
+            return False, latencies
+        nearby = game.nearby_mines(move)
+        if len(ai.moves_made) + 1 == safe_cells:
+            return True, latencies
+
+
+def merge(results):
+    """
+    Combine the (wins, moves, histogram) tuples of several chunks.
+    """
+    wins = 0
+    moves = 0
+    histogram = dict()
+    for chunk_wins, chunk_moves, chunk_histogram in results:
+        wins += chunk_wins
+        moves += chunk_moves
+        for bucket, count in chunk_histogram.items():
+            histogram[bucket] = histogram.get(bucket, 0) + count
+    return wins, moves, histogram
+
+
+def latency_bucket(latency):
+    """
+    Return the histogram bucket of a latency in nanoseconds.
+    """
+    return int(math.log(max(latency, 1), BUCKET_RATIO))
+
+
+def percentiles(histogram, moves):
+    """
+    Return the p50, p90, p99 and max latency in nanoseconds, read from
+    the upper edge of each histogram bucket.
+    """
+    targets = {"p50": 0.50, "p90": 0.90, "p99": 0.99, "max": 1.0}
+    result = {name: 0.0 for name in targets}
+    if not moves:
+        return result
+
+    seen = 0
+    pending = sorted(targets.items(), key=lambda item: item[1])
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        while pending and seen >= pending[0][1] * moves:
+            name, _ = pending.pop(0)
+            result[name] = BUCKET_RATIO ** (bucket + 1)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import time
+
+import numpy as np
+
+from nim import NimAI
+
+
+class NimSpace():
+
+    def __init__(self, initial=[1, 3, 5, 7]):
+        """
+        Dense encoding of every Nim state reachable from `initial`.
+
+        Each state `piles` maps to an integer index, reading the piles as
+        digits of a mixed-radix number, and each action `(i, j)` maps to
+        a column index. Precomputed tables include
+            - `piles`: the piles of every state, one row per index
+            - `valid`: whether each action is available in each state
+            - `next_state`: the index reached by each action, or -1
+        The state with every pile empty always has index 0.
+        """
+        self.initial = list(initial)
+        radix = [pile + 1 for pile in self.initial]
+        self.size = int(np.prod(radix))
+
+        self.strides = []
+        stride = 1
+        for base in reversed(radix):
+            self.strides.append(stride)
+            stride *= base
+        self.strides.reverse()
+
+        self.actions = [
+            (i, j)
+            for i, pile in enumerate(self.initial)
+            for j in range(1, pile + 1)
+        ]
+        self.action_index = {
+            action: k for k, action in enumerate(self.actions)
+        }
+        action_pile = np.array([i for i, _ in self.actions], dtype=np.intp)
+        action_count = np.array([j for _, j in self.actions], dtype=np.intp)
+
+        self.piles = np.stack(
+            np.unravel_index(np.arange(self.size), radix), axis=1
+        )
+        self.valid = self.piles[:, action_pile] >= action_count
+        removed = action_count * np.array(self.strides)[action_pile]
+        self.next_state = np.where(
+            self.valid, np.arange(self.size)[:, None] - removed, -1
+        )
+
+    def index(self, piles):
+        """
+        Return the index of the state `piles`.
+        """
+        return sum(pile * stride for pile, stride in zip(piles, self.strides))
+
+    def state(self, index):
+        """
+        Return the piles of the state with index `index` as a tuple.
+        """
+        return tuple(int(pile) for pile in self.piles[index])
+
+    def best_values(self, q, states=None):
+        """
+        Given a Q-table `q` with one row per state and one column per
+        action, return the best Q-value available in each of `states`
+        (default: every state), using 0 for the state with no
+        available actions.
+        """
+        if states is None:
+            states = np.arange(self.size)
+        values = np.where(self.valid[states], q[states], -np.inf).max(axis=1)
+        return np.where(states == 0, 0.0, values)
+
+    def to_ai(self, q, alpha=0.5, epsilon=0.1):
+        """
+        Return a NimAI whose Q-learning dictionary holds every non-zero
+        entry of the Q-table `q`.
+        """
+        ai = NimAI(alpha=alpha, epsilon=epsilon)
+        states, actions = np.nonzero(self.valid & (q != 0))
+
+        # Convert to Python objects in bulk rather than entry by entry,
+        # building the piles of each state only once
+        piles = [tuple(row) for row in self.piles.tolist()]
+        ai.q = dict(zip(
+            zip([piles[s] for s in states.tolist()],
+                [self.actions[a] for a in actions.tolist()]),
+            q[states, actions].tolist()
+        ))
+        return ai
+
+    def from_ai(self, ai):
+        """
+        Return the Q-table holding the Q-values of a NimAI.
+        """
+        q = np.zeros(self.valid.shape)
+        for (state, action), value in ai.q.items():
+            q[self.index(state), self.action_index[action]] = value
+        return q
+
+
+def train_table(space, n, q=None, alpha=0.5, epsilon=0.1, batch_size=1024,
+                seed=None, report_every=1.0):
+    """
+    Train a Q-table by playing `n` games of self-play on `space`,
+    `batch_size` games at a time in lockstep, and return it.
+
+    Rewards and updates follow `nim.train`: the player that takes the
+    last object gets -1, the other player gets 1, and every other move
+    gets 0 plus the best future Q-value, or 0 if that is negative.
+    Actions are chosen epsilon-greedily. If several games in a batch
+    update the same (state, action) pair in one step, the last update
+    wins.
+
+    Training continues from `q` if given. Progress is printed at most
+    once every `report_every` seconds.
+    """
+    rng = np.random.default_rng(seed)
+    if q is None:
+        q = np.zeros(space.valid.shape)
+    if n <= 0:
+        return q
+    start = space.index(space.initial)
+    batch_size = max(1, min(batch_size, n))
+
+    # State of each game in the batch, and last move made by each player
+    state = np.full(batch_size, start)
+    player = np.zeros(batch_size, dtype=np.intp)
+    last_state = np.full((2, batch_size), -1)
+    last_action = np.full((2, batch_size), -1)
+    active = np.ones(batch_size, dtype=bool)
+
+    started = batch_size
+    finished = 0
+    reported = time.perf_counter()
+
+    while active.any():
+        games = np.nonzero(active)[0]
+        s = state[games]
+        p = player[games]
+        other = 1 - p
+        valid = space.valid[s]
+
+        # Choose actions epsilon-greedily
+        greedy = np.where(valid, q[s], -np.inf).argmax(axis=1)
+        random = np.where(valid, rng.random(valid.shape), -1).argmax(axis=1)
+        explore = rng.random(len(games)) < epsilon
+        a = np.where(explore, random, greedy)
+
+        new = space.next_state[s, a]
+        done = new == 0
+        last_state[p, games] = s
+        last_action[p, games] = a
+
+        # The mover is punished when the game ends, and otherwise the
+        # opponent's previous move is rewarded by the position it left,
+        # never below 0 as in `NimAI.best_future_reward`
+        future = np.maximum(space.best_values(q, new), 0.0)
+        prior_state = last_state[other, games]
+        prior_action = last_action[other, games]
+        prior = prior_state >= 0
+        update_state = np.concatenate([s[done], prior_state[prior]])
+        update_action = np.concatenate([a[done], prior_action[prior]])
+        reward = np.concatenate([
+            np.full(done.sum(), -1.0),
+            np.where(done[prior], 1.0, 0.0)
+        ])
+        future = np.concatenate([np.zeros(done.sum()), future[prior]])
+
+        old = q[update_state, update_action]
+        q[update_state, update_action] = old + alpha * (reward + future - old)
+
+        state[games] = new
+        player[games] = other
+
+        # Start new games in the slots of finished ones
+        ended = games[done]
+        finished += len(ended)
+        restart = ended[:max(0, n - started)]
+        started += len(restart)
+        active[ended[len(restart):]] = False
+        state[restart] = start
+        player[restart] = 0
+        last_state[:, restart] = -1
+        last_action[:, restart] = -1
+
+        now = time.perf_counter()
+        if report_every is not None and now - reported >= report_every:
+            print(f"Played {finished} of {n} training games")
+            reported = now
+
+    return q
+
+
+def train_batch(n, initial=[1, 3, 5, 7], alpha=0.5, epsilon=0.1,
+                batch_size=1024, seed=None):
+    """
+    Train an AI by playing `n` games against itself in vectorized
+    batches, and return it as a NimAI.
+    """
+    space = NimSpace(initial)
+    q = train_table(
+        space, n, alpha=alpha, epsilon=epsilon,
+        batch_size=batch_size, seed=seed
+    )
+    print("Done training")
+    return space.to_ai(q, alpha=alpha, epsilon=epsilon)
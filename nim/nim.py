@@ -5,6 +5,9 @@ import time
 
 class Nim():
 
+    # Available actions of every pile configuration seen so far
+    actions_cache = dict()
+
     def __init__(self, initial=[1, 3, 5, 7]):
         """
         Initialize game board.
@@ -25,11 +28,19 @@ class Nim():
 
         Action `(i, j)` represents the action of removing `j` items
         from pile `i` (where piles are 0-indexed).
+
+        The result is computed once per pile configuration and shared,
+        so it is returned as a frozenset.
         """
-        actions = set()
-        for i, pile in enumerate(piles):
-            for j in range(1, pile + 1):
-                actions.add((i, j))
+        piles = tuple(piles)
+        actions = cls.actions_cache.get(piles)
+        if actions is None:
+            actions = frozenset(
+                (i, j)
+                for i, pile in enumerate(piles)
+                for j in range(1, pile + 1)
+            )
+            cls.actions_cache[piles] = actions
         return actions
 
     @classmethod
@@ -86,6 +97,10 @@ class NimAI():
         self.alpha = alpha
         self.epsilon = epsilon
 
+        # Cache mapping a state to its best `(action, Q-value)` pair,
+        # kept in sync by `update_q_value`
+        self.best = dict()
+
     def update(self, old_state, action, new_state, reward):
         """
         Update Q-learning model, given an old state, an action taken
@@ -101,10 +116,7 @@ class NimAI():
         Return the Q-value for the state `state` and the action `action`.
         If no Q-value exists yet in `self.q`, return 0.
         """
-        if (tuple(state), action) in self.q:
-            return self.q[(tuple(state), action)]
-        else:
-            return 0
+        return self.q.get((tuple(state), action), 0)
 
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
@@ -122,7 +134,35 @@ class NimAI():
         `alpha` is the learning rate, and `new value estimate`
         is the sum of the current reward and estimated future rewards.
         """
-        self.q[(tuple(state), action)] = old_q + self.alpha * ((reward + future_rewards) - old_q)
+        state = tuple(state)
+        new_q = old_q + self.alpha * ((reward + future_rewards) - old_q)
+        self.q[(state, action)] = new_q
+
+        # Keep the cached best action of this state up to date
+        if state in self.best:
+            best_action, best_q = self.best[state]
+            if new_q >= best_q:
+                self.best[state] = (action, new_q)
+            elif action == best_action:
+                del self.best[state]
+
+    def best_action(self, state):
+        """
+        Return the pair `(action, Q-value)` of the action with the
+        highest Q-value in `state`, using 0 for pairs that have no
+        Q-value, or `(None, 0)` if there are no available actions.
+        """
+        state = tuple(state)
+        if state not in self.best:
+            best_action = None
+            best_q = 0
+            for action in Nim.available_actions(state):
+                q = self.q.get((state, action), 0)
+                if best_action is None or best_q < q:
+                    best_action = action
+                    best_q = q
+            self.best[state] = (best_action, best_q)
+        return self.best[state]
 
 
     def best_future_reward(self, state):
@@ -135,14 +175,8 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
-        best_reward = 0
-
-        available_actions = Nim.available_actions(state)
-        for action in available_actions:
-            possible_reward = self.get_q_value(state, action)
-            best_reward = max(possible_reward, best_reward)
-
-        return best_reward
+        _, best_reward = self.best_action(state)
+        return max(best_reward, 0)
 
 
     def choose_action(self, state, epsilon=True):
@@ -160,21 +194,13 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
-        available_actions = Nim.available_actions(state)
-
-        best_action = None
-        best_reward = 0
-
-        for action in available_actions:
-            possible_reward = self.get_q_value(state, action)
-            if best_action is None or best_reward < possible_reward:
-                best_action = action
-                best_reward = possible_reward
+        best_action, _ = self.best_action(state)
 
         if not epsilon:
             return best_action
 
         else:
+            available_actions = Nim.available_actions(state)
             weights = [(1 - epsilon) if action is None else self.epsilon for action in available_actions]
             best_action = random.choices(list(available_actions), weights, k=1)[0]
             
@@ -0,0 +1,69 @@
+import multiprocessing
+
+import numpy as np
+
+from batch import NimSpace, train_table
+
+
+def train_parallel(n, initial=[1, 3, 5, 7], workers=None, rounds=10,
+                   alpha=0.5, epsilon=0.1, batch_size=1024, seed=None):
+    """
+    Train an AI by playing `n` games of self-play spread over `workers`
+    processes (default: one per core), and return it as a NimAI.
+
+    Training runs in `rounds` rounds. In each round every worker starts
+    from the shared Q-table and plays its share of games on its own
+    copy. The copies are then merged: each Q-value moves by the average
+    change of the workers that updated it.
+    """
+    space = NimSpace(initial)
+    q = np.zeros(space.valid.shape)
+    workers = workers or multiprocessing.cpu_count()
+    rng = np.random.default_rng(seed)
+
+    with multiprocessing.Pool(workers) as pool:
+        played = 0
+        for r in range(rounds):
+
+            # Split the games of this round evenly between workers
+            games = (n - played) // (rounds - r)
+            shares = [
+                games // workers + (1 if k < games % workers else 0)
+                for k in range(workers)
+            ]
+            jobs = [
+                (initial, q, share, alpha, epsilon, batch_size,
+                 int(rng.integers(2 ** 32)))
+                for share in shares if share
+            ]
+            q = merge(q, pool.map(train_worker, jobs))
+            played += games
+            print(f"Finished round {r + 1} of {rounds} ({played} games)")
+
+    print("Done training")
+    return space.to_ai(q, alpha=alpha, epsilon=epsilon)
+
+
+def train_worker(job):
+    """
+    Play one worker's share of a round, starting from Q-table `q`,
+    and return the worker's updated Q-table.
+    """
+    initial, q, n, alpha, epsilon, batch_size, seed = job
+    return train_table(
+        NimSpace(initial), n, q=q.copy(), alpha=alpha, epsilon=epsilon,
+        batch_size=batch_size, seed=seed, report_every=None
+    )
+
+
+def merge(q, tables):
+    """
+    Merge the Q-tables trained by several workers from the common
+    starting table `q`. Each entry changes by the mean change over
+    the workers that changed it.
+    """
+    if not tables:
+        return q
+    changes = np.stack(tables) - q
+    updated = np.count_nonzero(changes, axis=0)
+    return q + changes.sum(axis=0) / np.maximum(updated, 1)
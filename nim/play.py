@@ -1,4 +1,14 @@
+import os
+
 from nim import train, play
+from snapshot import load, save
+
+# Trained Q-values are kept here between runs
+SNAPSHOT = "nim.nimq"
 
-ai = train(10000)
+if os.path.exists(SNAPSHOT):
+    ai = load(SNAPSHOT)
+else:
+    ai = train(10000)
+    save(ai, SNAPSHOT)
 play(ai)
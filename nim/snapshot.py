@@ -0,0 +1,85 @@
+import struct
+
+import numpy as np
+
+from batch import NimSpace, train_table
+
+# Every snapshot starts with these bytes and a format version
+MAGIC = b"NIMQ"
+VERSION = 1
+
+# Header after the magic bytes: version, alpha, epsilon, number of piles
+HEADER = struct.Struct("<HddH")
+
+
+def save_table(filename, space, q, alpha=0.5, epsilon=0.1):
+    """
+    Write the Q-table `q` of `space` to `filename`.
+
+    The file holds a versioned header with alpha, epsilon and the
+    initial pile configuration, followed by the dense Q-table as
+    little-endian doubles, one row per state index.
+    """
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(VERSION, alpha, epsilon, len(space.initial)))
+        f.write(struct.pack(f"<{len(space.initial)}H", *space.initial))
+        f.write(np.ascontiguousarray(q, dtype="<f8").tobytes())
+
+
+def load_table(filename):
+    """
+    Read a snapshot written by `save_table`.
+    Return a tuple (space, q, alpha, epsilon).
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise Exception("Not a Nim Q-table snapshot")
+    offset = len(MAGIC)
+    version, alpha, epsilon, count = HEADER.unpack_from(data, offset)
+    if version != VERSION:
+        raise Exception(f"Unsupported snapshot version {version}")
+    offset += HEADER.size
+    initial = list(struct.unpack_from(f"<{count}H", data, offset))
+    offset += 2 * count
+
+    space = NimSpace(initial)
+    q = np.frombuffer(data, dtype="<f8", offset=offset)
+    if q.size != space.valid.size:
+        raise Exception("Snapshot does not match its pile configuration")
+    q = q.reshape(space.valid.shape).copy()
+    return space, q, alpha, epsilon
+
+
+def save(ai, filename, initial=[1, 3, 5, 7]):
+    """
+    Write the Q-values of a NimAI trained on games starting from
+    `initial` to `filename`.
+    """
+    space = NimSpace(initial)
+    save_table(filename, space, space.from_ai(ai), ai.alpha, ai.epsilon)
+
+
+def load(filename):
+    """
+    Load a NimAI from a snapshot written by `save` or `save_table`.
+    """
+    space, q, alpha, epsilon = load_table(filename)
+    return space.to_ai(q, alpha=alpha, epsilon=epsilon)
+
+
+def resume(filename, n, batch_size=1024, seed=None):
+    """
+    Continue training the snapshot in `filename` for `n` more games
+    with the batch trainer, and write the result back to it.
+    Return the trained NimAI.
+    """
+    space, q, alpha, epsilon = load_table(filename)
+    q = train_table(
+        space, n, q=q, alpha=alpha, epsilon=epsilon,
+        batch_size=batch_size, seed=seed
+    )
+    save_table(filename, space, q, alpha, epsilon)
+    return space.to_ai(q, alpha=alpha, epsilon=epsilon)
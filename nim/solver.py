@@ -0,0 +1,136 @@
+import sys
+from functools import reduce
+
+import numpy as np
+
+from nim import Nim
+from snapshot import load_table
+
+
+def winning(piles):
+    """
+    Return True if the player to move in `piles` wins with perfect play.
+
+    In `Nim` the player who takes the last object loses (misere Nim).
+    With some pile of two or more objects the player to move wins
+    exactly when the nim-sum of the piles is non-zero. Otherwise every
+    pile holds at most one object, and the player to move wins exactly
+    when an even number of piles are left.
+    """
+    if any(pile > 1 for pile in piles):
+        return reduce(lambda a, b: a ^ b, piles, 0) != 0
+    return sum(piles) % 2 == 0
+
+
+def optimal_action(piles):
+    """
+    Return an action `(i, j)` that wins from `piles` if there is one,
+    and otherwise any available action. Return None if no actions
+    are available.
+    """
+    piles = list(piles)
+    actions = sorted(Nim.available_actions(piles))
+    for i, j in actions:
+        piles[i] -= j
+        lost = not winning(piles)
+        piles[i] += j
+        if lost:
+            return (i, j)
+    return actions[0] if actions else None
+
+
+def solve_table(space):
+    """
+    Return a boolean array with one entry per state index of `space`,
+    True where the player to move wins with perfect play.
+
+    The table is filled by retrograde analysis, one level of equal
+    object count at a time, from the empty position (a win for the
+    player to move, since the opponent took the last object) upwards.
+    """
+    win = np.zeros(space.size, dtype=bool)
+    win[0] = True
+    totals = space.piles.sum(axis=1)
+    for total in range(1, totals.max() + 1):
+        states = np.nonzero(totals == total)[0]
+        following = space.next_state[states]
+        valid = space.valid[states]
+        win[states] = (valid & ~win[np.where(valid, following, 0)]).any(axis=1)
+    return win
+
+
+def nim_sum_table(space):
+    """
+    Return the same table as `solve_table`, computed directly from the
+    nim-sum of every state.
+    """
+    piles = space.piles
+    nim_sum = np.bitwise_xor.reduce(piles, axis=1)
+    large = (piles > 1).any(axis=1)
+    return np.where(large, nim_sum != 0, piles.sum(axis=1) % 2 == 0)
+
+
+def optimal_actions(space, win=None):
+    """
+    Return a boolean array over (state, action) marking the optimal
+    actions: those leading to a lost position for the opponent if the
+    state is won, and every available action otherwise.
+    """
+    if win is None:
+        win = solve_table(space)
+    following = np.where(space.valid, space.next_state, 0)
+    winning_moves = space.valid & ~win[following]
+    return np.where(win[:, None], winning_moves, space.valid)
+
+
+def evaluate(space, q, win=None):
+    """
+    Compare the greedy policy of Q-table `q` on `space` with perfect play
+    over every state that has an available action.
+
+    A state counts as agreeing only if every action tied for the best
+    Q-value is optimal. Return a dict with the number of states, the
+    fraction of agreeing states, and the same fraction restricted to
+    won states, where the choice of move matters.
+    """
+    if win is None:
+        win = solve_table(space)
+    optimal = optimal_actions(space, win)
+
+    states = np.arange(1, space.size)
+    valid = space.valid[states]
+    values = np.where(valid, q[states], -np.inf)
+    best = values == values.max(axis=1, keepdims=True)
+    agree = ~(best & ~optimal[states]).any(axis=1)
+    won = win[states]
+
+    return {
+        "states": len(states),
+        "agreement": float(agree.mean()),
+        "winning_states": int(won.sum()),
+        "winning_agreement": float(agree[won].mean()) if won.any() else 1.0,
+    }
+
+
+def main():
+
+    # Check command-line arguments
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python solver.py snapshot")
+
+    space, q, _, _ = load_table(sys.argv[1])
+    win = solve_table(space)
+    if not (win == nim_sum_table(space)).all():
+        sys.exit("Solver disagrees with nim-sum analysis")
+
+    results = evaluate(space, q, win)
+    print(f"Piles: {space.initial}")
+    print(f"States evaluated: {results['states']}")
+    print(f"Optimal move agreement: {100 * results['agreement']:.2f}%")
+    print(f"Winning states: {results['winning_states']}")
+    print(f"Agreement on winning states: "
+          f"{100 * results['winning_agreement']:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
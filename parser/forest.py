@@ -0,0 +1,311 @@
+from collections import OrderedDict
+
+import nltk
+
+# Parses kept per parser, most recently used last
+CACHE_SIZE = 128
+
+
+class CompiledGrammar():
+
+    def __init__(self, grammar):
+        """
+        Compile the `nltk.CFG` `grammar` into integer-indexed tables.
+
+        Nonterminals are numbered in order of first appearance and every
+        rule becomes a pair (lhs, rhs) of a nonterminal number and a tuple
+        of nonterminal numbers. Rules with a single terminal on the right
+        go into `lexicon`, a map from each word to the nonterminals that
+        produce it. Rules mixing terminals with nonterminals, or with an
+        empty right-hand side, are not supported.
+        """
+        self.names = []
+        self.numbers = dict()
+        self.rules = []
+        self.lexicon = dict()
+        self.start = self.number(grammar.start())
+
+        for production in grammar.productions():
+            lhs = self.number(production.lhs())
+            rhs = production.rhs()
+            if len(rhs) == 1 and isinstance(rhs[0], str):
+                self.lexicon.setdefault(rhs[0], []).append(lhs)
+            elif rhs and all(isinstance(s, nltk.Nonterminal) for s in rhs):
+                self.rules.append((lhs, tuple(self.number(s) for s in rhs)))
+            else:
+                raise ValueError(f"Unsupported rule {production}")
+
+        # Rules of each nonterminal, by rule number
+        self.expansions = [[] for _ in self.names]
+        for r, (lhs, _) in enumerate(self.rules):
+            self.expansions[lhs].append(r)
+
+    def number(self, symbol):
+        """
+        Return the number of the nonterminal `symbol`, adding it if new.
+        """
+        name = str(symbol)
+        if name not in self.numbers:
+            self.numbers[name] = len(self.names)
+            self.names.append(name)
+        return self.numbers[name]
+
+
+class Forest():
+
+    def __init__(self, grammar, words, spans, ends):
+        """
+        Create the packed parse forest of `words`.
+
+        A node (A, i, j) stands for every way nonterminal A derives
+        words i to j. `spans` is the set of such nodes found by the
+        recognizer and `ends[A, i]` the ends j of the nodes of A starting
+        at i. The ways each node is derived are worked out the first time
+        they are needed and then kept, so trees shared between parses are
+        only built once.
+        """
+        self.grammar = grammar
+        self.words = words
+        self.spans = spans
+        self.ends = ends
+        self.root = (grammar.start, 0, len(words))
+        self.packed = dict()
+        self.counts = dict()
+
+    def recognized(self):
+        """
+        Return True if the start symbol derives all the words.
+        """
+        return self.root in self.spans
+
+    def derivations(self, node):
+        """
+        Return the ways `node` is derived, as a list of tuples of child
+        nodes. A derivation of a single word is the tuple (word,).
+        """
+        if node in self.packed:
+            return self.packed[node]
+
+        a, i, j = node
+        result = []
+        if j == i + 1 and a in self.grammar.lexicon.get(self.words[i], ()):
+            result.append((self.words[i],))
+        for r in self.grammar.expansions[a]:
+            rhs = self.grammar.rules[r][1]
+            for children in self.splits(rhs, 0, i, j):
+                result.append(children)
+
+        self.packed[node] = result
+        return result
+
+    def splits(self, rhs, m, i, j):
+        """
+        Yield the tuples of nodes for symbols `rhs[m:]` that together
+        derive words i to j.
+        """
+        symbol = rhs[m]
+        if m == len(rhs) - 1:
+            if (symbol, i, j) in self.spans:
+                yield ((symbol, i, j),)
+            return
+        for k in self.ends.get((symbol, i), ()):
+            if k < j:
+                for rest in self.splits(rhs, m + 1, k, j):
+                    yield ((symbol, i, k),) + rest
+
+    def count(self, node=None):
+        """
+        Return the number of distinct trees of `node`, by default the
+        root, without building any of them.
+        """
+        if node is None:
+            node = self.root
+        if node not in self.spans:
+            return 0
+        if node not in self.counts:
+            total = 0
+            for children in self.derivations(node):
+                product = 1
+                for child in children:
+                    if isinstance(child, tuple):
+                        product *= self.count(child)
+                total += product
+            self.counts[node] = total
+        return self.counts[node]
+
+    def trees(self, node=None):
+        """
+        Yield the trees of `node`, by default the root, as `nltk.Tree`
+        objects, one at a time.
+        """
+        if node is None:
+            node = self.root
+        if node not in self.spans:
+            return
+        label = self.grammar.names[node[0]]
+        for children in self.derivations(node):
+            for subtrees in self.combinations(children, 0):
+                yield nltk.Tree(label, list(subtrees))
+
+    def combinations(self, children, m):
+        """
+        Yield every tuple of subtrees for `children[m:]`.
+        """
+        if m == len(children):
+            yield ()
+            return
+        child = children[m]
+        if isinstance(child, str):
+            options = [child]
+        else:
+            options = self.trees(child)
+        for first in options:
+            for rest in self.combinations(children, m + 1):
+                yield (first,) + rest
+
+    def nodes(self):
+        """
+        Return the list of nodes that appear in some tree of the root.
+        """
+        if not self.recognized():
+            return []
+        seen = {self.root}
+        stack = [self.root]
+        while stack:
+            for children in self.derivations(stack.pop()):
+                for child in children:
+                    if isinstance(child, tuple) and child not in seen:
+                        seen.add(child)
+                        stack.append(child)
+        return list(seen)
+
+    def np_chunks(self, label="NP"):
+        """
+        Return the noun phrase chunks of all parses: one tree for each
+        `label` node that appears in some parse and can be derived
+        without any other `label` node below it, in order of position.
+        """
+        number = self.grammar.numbers.get(label)
+        free = dict()
+
+        def chunk_free(node):
+            # Whether `node` has a derivation without `label` below it
+            if node not in free:
+                free[node] = any(
+                    all(isinstance(child, str) or
+                        (child[0] != number and chunk_free(child))
+                        for child in children)
+                    for children in self.derivations(node)
+                )
+            return free[node]
+
+        chunks = sorted(
+            (node for node in self.nodes()
+             if node[0] == number and chunk_free(node)),
+            key=lambda node: (node[1], node[2])
+        )
+        return [self.chunk_tree(node, number) for node in chunks]
+
+    def chunk_tree(self, node, number):
+        """
+        Return a tree of `node` with no `number` nodes below it.
+        """
+        for tree in self.trees(node):
+            if not any(subtree.label() == self.grammar.names[number]
+                       for subtree in list(tree.subtrees())[1:]):
+                return tree
+
+
+class ForestParser():
+
+    def __init__(self, grammar):
+        """
+        Create an Earley parser for the `nltk.CFG` `grammar` that
+        builds packed parse forests, remembering recent sentences.
+        """
+        self.grammar = CompiledGrammar(grammar)
+        self.cache = OrderedDict()
+
+    def parse(self, words):
+        """
+        Return the `Forest` of the list of words `words`.
+        Raise ValueError if some word is not in the grammar.
+        """
+        key = tuple(words)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        missing = [word for word in words if word not in self.grammar.lexicon]
+        if missing:
+            raise ValueError(
+                "Grammar does not cover some of the input words: "
+                + ", ".join(repr(word) for word in missing) + "."
+            )
+
+        forest = Forest(self.grammar, list(words), *self.recognize(words))
+        self.cache[key] = forest
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return forest
+
+    def recognize(self, words):
+        """
+        Run the Earley recognizer over `words` and return a pair
+        (spans, ends) of the completed nodes, as used by `Forest`.
+
+        Items are triples (rule, dot, origin) of integers. Items waiting
+        for a nonterminal at a position are indexed by it, so completing
+        a node only touches the items that can use it. Since no rule is
+        empty, every item waiting at a position is known before any node
+        starting there is completed.
+        """
+        grammar = self.grammar
+        rules = grammar.rules
+        n = len(words)
+        spans = set()
+        ends = dict()
+        chart = [set() for _ in range(n + 1)]
+        waiting = [dict() for _ in range(n + 1)]
+        predicted = [set() for _ in range(n + 1)]
+        agendas = [[] for _ in range(n + 1)]
+
+        def add(k, item):
+            if item not in chart[k]:
+                chart[k].add(item)
+                agendas[k].append(item)
+
+        def complete(a, i, k):
+            node = (a, i, k)
+            if node in spans:
+                return
+            spans.add(node)
+            ends.setdefault((a, i), []).append(k)
+            for r, dot, origin in waiting[i].get(a, ()):
+                add(k, (r, dot + 1, origin))
+
+        def predict(a, k):
+            if a not in predicted[k]:
+                predicted[k].add(a)
+                for r in grammar.expansions[a]:
+                    add(k, (r, 0, k))
+
+        predict(grammar.start, 0)
+        for k in range(n + 1):
+            agenda = agendas[k]
+            while agenda:
+                r, dot, origin = item = agenda.pop()
+                lhs, rhs = rules[r]
+                if dot == len(rhs):
+                    complete(lhs, origin, k)
+                    continue
+                symbol = rhs[dot]
+                waiting[k].setdefault(symbol, []).append(item)
+                predict(symbol, k)
+
+            # Scan the next word as each of its preterminals
+            if k < n:
+                for a in grammar.lexicon[words[k]]:
+                    complete(a, k, k + 1)
+
+        return spans, ends
@@ -1,8 +1,11 @@
+import itertools
 import nltk
 import sys
 import re
 from nltk.tokenize import word_tokenize
 
+from forest import Forest, ForestParser
+
 TERMINALS = """
 Adj -> "country" | "dreadful" | "enigmatical" | "little" | "moist" | "red"
 Adv -> "down" | "here" | "never"
@@ -29,6 +32,12 @@ VP -> V | V NP | V Adv | V PP | V NP PP
 grammar = nltk.CFG.fromstring(NONTERMINALS + TERMINALS)
 parser = nltk.ChartParser(grammar)
 
+# Parser over the integer-compiled grammar, building packed forests
+forest_parser = ForestParser(grammar)
+
+# Most trees printed for one sentence
+MAX_TREES = 10
+
 
 def main():
 
@@ -46,22 +55,31 @@ def main():
 
     # Attempt to parse sentence
     try:
-        trees = list(parser.parse(s))
+        forest = forest_parser.parse(s)
     except ValueError as e:
         print(e)
         return
-    if not trees:
+    if not forest.recognized():
         print("Could not parse sentence.")
         return
 
-    # Print each tree with noun phrase chunks
-    for tree in trees:
+    # Print each tree with noun phrase chunks, building only the trees
+    # that are printed
+    for tree in itertools.islice(forest.trees(), MAX_TREES):
         tree.pretty_print()
 
         print("Noun Phrase Chunks")
         for np in np_chunk(tree):
             print(" ".join(np.flatten()))
 
+    # Summarize the rest from the forest
+    count = forest.count()
+    if count > MAX_TREES:
+        print(f"{count - MAX_TREES} more parses not shown")
+        print("Noun Phrase Chunks in all parses")
+        for np in np_chunk(forest):
+            print(" ".join(np.flatten()))
+
 
 def preprocess(sentence):
     """
@@ -84,7 +102,13 @@ def np_chunk(tree):
     A noun phrase chunk is defined as any subtree of the sentence
     whose label is "NP" that does not itself contain any other
     noun phrases as subtrees.
+
+    `tree` may also be a `Forest`, whose chunks across all parses are
+    found without building the parses.
     """
+    if isinstance(tree, Forest):
+        return tree.np_chunks()
+
     NP = []
     for subtree in tree.subtrees():
         if subtree.label() == "NP":
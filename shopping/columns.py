@@ -0,0 +1,127 @@
+import calendar
+import itertools
+
+import numpy as np
+
+# Evidence columns in the order used by `shopping.load_data`, with the
+# type each is parsed as
+EVIDENCE = [
+    ("Administrative", np.int64),
+    ("Administrative_Duration", np.float64),
+    ("Informational", np.int64),
+    ("Informational_Duration", np.float64),
+    ("ProductRelated", np.int64),
+    ("ProductRelated_Duration", np.float64),
+    ("BounceRates", np.float64),
+    ("ExitRates", np.float64),
+    ("PageValues", np.float64),
+    ("SpecialDay", np.float64),
+    ("Month", np.int8),
+    ("OperatingSystems", np.int64),
+    ("Browser", np.int64),
+    ("Region", np.int64),
+    ("TrafficType", np.int64),
+    ("VisitorType", np.int8),
+    ("Weekend", np.int8),
+]
+LABEL = "Revenue"
+
+# Columns holding names rather than numbers
+CATEGORICAL = ["Month", "VisitorType", "Weekend"]
+
+# Rows parsed at a time when streaming
+CHUNK_SIZE = 100000
+
+MONTHS = {name: num - 1 for num, name in enumerate(calendar.month_abbr) if num}
+
+
+def encode_months(values):
+    """
+    Return the month index 0-11 of each month name in the string
+    array `values`, by comparing their first three letters with each
+    abbreviation.
+    """
+    prefixes = values.astype("U3")
+    codes = np.full(len(values), -1, dtype=np.int8)
+    for name, number in MONTHS.items():
+        codes[prefixes == name] = number
+    if (codes < 0).any():
+        raise ValueError(f"Unknown month {values[codes < 0][0]}")
+    return codes
+
+
+def parse_columns(header, lines):
+    """
+    Parse the CSV `lines` of a file with column names `header` into
+    a dict from column name to typed array.
+
+    Numeric columns are parsed together as floats and the categorical
+    columns as strings, each in a single pass over the lines. Month is
+    encoded as an index from 0 (January) to 11 (December), VisitorType
+    as 1 for returning visitors and 0 otherwise, and Weekend and Revenue
+    as 1 if true and 0 otherwise.
+    """
+    position = {name: k for k, name in enumerate(header)}
+    numeric = [name for name, _ in EVIDENCE if name not in CATEGORICAL]
+    categorical = CATEGORICAL + [LABEL]
+
+    numbers = np.loadtxt(
+        lines, delimiter=",", dtype=np.float64, ndmin=2,
+        usecols=[position[name] for name in numeric]
+    )
+    strings = np.loadtxt(
+        lines, delimiter=",", dtype=str, ndmin=2,
+        usecols=[position[name] for name in categorical]
+    )
+
+    columns = dict()
+    types = dict(EVIDENCE)
+    for k, name in enumerate(numeric):
+        columns[name] = numbers[:, k].astype(types[name])
+    columns["Month"] = encode_months(strings[:, 0])
+    columns["VisitorType"] = (strings[:, 1] == "Returning_Visitor").astype(np.int8)
+    columns["Weekend"] = (strings[:, 2] == "TRUE").astype(np.int8)
+    columns[LABEL] = (strings[:, 3] == "TRUE").astype(np.int8)
+    return columns
+
+
+def read_chunks(filename, chunk_size=CHUNK_SIZE):
+    """
+    Yield the shopping data in the CSV file `filename` as dicts of
+    typed column arrays of at most `chunk_size` rows each, so that
+    files of any size can be processed in bounded memory.
+    """
+    with open(filename) as f:
+        header = f.readline().strip().split(",")
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            yield parse_columns(header, lines)
+
+
+def to_arrays(columns):
+    """
+    Return a tuple (evidence, labels) of the columns, where evidence is
+    a float32 matrix with the columns in the order of `load_data`.
+    """
+    evidence = np.column_stack([
+        columns[name].astype(np.float32) for name, _ in EVIDENCE
+    ])
+    return evidence, columns[LABEL]
+
+
+def load_arrays(filename, chunk_size=CHUNK_SIZE):
+    """
+    Load the shopping data in the CSV file `filename` into a tuple
+    (evidence, labels) of NumPy arrays, as `to_arrays` does.
+    """
+    evidence, labels = [], []
+    for columns in read_chunks(filename, chunk_size):
+        chunk_evidence, chunk_labels = to_arrays(columns)
+        evidence.append(chunk_evidence)
+        labels.append(chunk_labels)
+    if not evidence:
+        evidence = [np.empty((0, len(EVIDENCE)), dtype=np.float32)]
+        labels = [np.empty(0, dtype=np.int8)]
+    return np.concatenate(evidence), np.concatenate(labels)
@@ -0,0 +1,168 @@
+import hashlib
+import pickle
+import sys
+
+import numpy as np
+from sklearn.neighbors import BallTree, KDTree
+
+from columns import load_arrays
+
+# Spatial indexes that can back the classifier
+INDEXES = {"kd_tree": KDTree, "ball_tree": BallTree}
+
+# Model files start with these bytes, which include the format version,
+# followed by the SHA-256 of the pickled model
+MAGIC = b"SHPM1"
+
+# Rows predicted at a time, which bounds the memory used by queries
+BATCH_SIZE = 65536
+
+
+class IndexedNeighbors():
+
+    def __init__(self, n_neighbors=1, algorithm="kd_tree", leaf_size=40,
+                 batch_size=BATCH_SIZE):
+        """
+        Create a k-nearest neighbor classifier over standardized evidence.
+
+        Evidence is converted to a float32 matrix and each column is
+        scaled to zero mean and unit variance with the statistics of the
+        training data, so that no feature dominates the distance by its
+        units alone. The training rows are kept in a KD-tree or ball tree
+        (`algorithm`) with `leaf_size` rows per leaf.
+        """
+        if algorithm not in INDEXES:
+            raise ValueError(f"Unknown index {algorithm}")
+        self.n_neighbors = n_neighbors
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.batch_size = batch_size
+
+        self.mean = None
+        self.scale = None
+        self.labels = None
+        self.index = None
+
+    def get_params(self):
+        """
+        Return the parameters of the classifier and its index.
+        """
+        return {
+            "n_neighbors": self.n_neighbors,
+            "algorithm": self.algorithm,
+            "leaf_size": self.leaf_size,
+            "batch_size": self.batch_size,
+        }
+
+    def transform(self, evidence):
+        """
+        Return `evidence` as a standardized float32 matrix.
+        """
+        matrix = np.asarray(evidence, dtype=np.float32)
+        return (matrix - self.mean) / self.scale
+
+    def fit(self, evidence, labels):
+        """
+        Standardize `evidence`, index it, and remember `labels`.
+        Return the classifier.
+        """
+        matrix = np.asarray(evidence, dtype=np.float32)
+        self.mean = matrix.mean(axis=0)
+        scale = matrix.std(axis=0)
+
+        # Constant columns carry no distance information
+        scale[scale == 0] = 1
+        self.scale = scale
+
+        self.labels = np.asarray(labels, dtype=np.int8)
+        self.index = INDEXES[self.algorithm](
+            self.transform(matrix), leaf_size=self.leaf_size
+        )
+        return self
+
+    def predict(self, evidence):
+        """
+        Return an array with the predicted label of each row of
+        `evidence`, the majority label of its nearest training rows.
+
+        Rows are queried against the index in batches, and a tie between
+        the labels goes to the positive label.
+        """
+        matrix = self.transform(evidence)
+        predictions = np.empty(len(matrix), dtype=np.int8)
+        for start in range(0, len(matrix), self.batch_size):
+            batch = matrix[start:start + self.batch_size]
+            nearest = self.index.query(
+                batch, k=self.n_neighbors, return_distance=False
+            )
+            votes = self.labels[nearest].mean(axis=1)
+            predictions[start:start + len(batch)] = votes >= 0.5
+        return predictions
+
+
+def train_indexed_model(evidence, labels, **params):
+    """
+    Given evidence and labels, return a fitted `IndexedNeighbors`
+    classifier with the given parameters.
+    """
+    return IndexedNeighbors(**params).fit(evidence, labels)
+
+
+def save_model(model, filename):
+    """
+    Write a fitted model to `filename`: its parameters, standardization,
+    training labels and index, which holds the standardized training
+    matrix, so that loading needs no refitting. The contents are
+    preceded by their checksum.
+    """
+    state = {
+        "params": model.get_params(),
+        "mean": model.mean,
+        "scale": model.scale,
+        "labels": model.labels,
+        "index": model.index,
+    }
+    data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(hashlib.sha256(data).digest())
+        f.write(data)
+
+
+def load_model(filename):
+    """
+    Read a model written by `save_model`, checking its format and
+    checksum, and return it.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    header = len(MAGIC) + 32
+    if data[:len(MAGIC)] != MAGIC:
+        raise Exception("Not a shopping model file")
+    if hashlib.sha256(data[header:]).digest() != data[len(MAGIC):header]:
+        raise Exception("Model file is corrupted")
+    state = pickle.loads(data[header:])
+
+    model = IndexedNeighbors(**state["params"])
+    model.mean = state["mean"]
+    model.scale = state["scale"]
+    model.labels = state["labels"]
+    model.index = state["index"]
+    return model
+
+
+def main():
+
+    # Check command-line arguments
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python model.py data model")
+
+    # Train on all the data and save the model
+    evidence, labels = load_arrays(sys.argv[1])
+    model = train_indexed_model(evidence, labels)
+    save_model(model, sys.argv[2])
+    print(f"Trained on {len(labels)} sessions, saved to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
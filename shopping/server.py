@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import numpy as np
+
+from columns import EVIDENCE
+from model import load_model
+
+# Most requests predicted together, and longest a request waits for
+# others to join its batch
+MAX_BATCH = 256
+MAX_DELAY = 0.002
+
+# Latencies kept for the percentiles, most recent last
+LATENCY_WINDOW = 100000
+
+# Seconds between latency reports
+REPORT_INTERVAL = 10
+
+
+class Scorer():
+
+    def __init__(self, model, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        """
+        Score sessions with `model`, predicting the sessions of concurrent
+        requests together.
+
+        A batch starts with the first waiting request and takes in others
+        until it holds `max_batch` requests or `max_delay` seconds have
+        passed. Each batch is predicted with a single vectorized call in
+        a worker thread, so the event loop keeps accepting requests.
+        """
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+
+    async def score(self, evidence):
+        """
+        Return the predicted label of the session `evidence`, a list of
+        evidence values in the order of `load_data`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((evidence, future))
+        return await future
+
+    async def run(self):
+        """
+        Collect waiting requests into batches and predict them, forever.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            matrix = np.array([evidence for evidence, _ in batch],
+                              dtype=np.float32)
+            try:
+                predictions = await loop.run_in_executor(
+                    None, self.model.predict, matrix
+                )
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.batches += 1
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(int(prediction))
+
+    def record(self, seconds):
+        """
+        Record the latency of one request.
+        """
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def stats(self):
+        """
+        Return a dict with the number of requests and batches served and
+        the p50 and p99 latencies of recent requests in milliseconds.
+        """
+        result = {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0,
+        }
+        if self.latencies:
+            p50, p99 = np.percentile(self.latencies, [50, 99])
+            result["p50_ms"] = 1000 * p50
+            result["p99_ms"] = 1000 * p99
+        return result
+
+
+def parse_request(line):
+    """
+    Return the evidence list of the request `line`, a JSON array of
+    evidence values in the order of `load_data`.
+    """
+    evidence = json.loads(line)
+    if (not isinstance(evidence, list) or len(evidence) != len(EVIDENCE)
+            or not all(isinstance(value, (int, float)) for value in evidence)):
+        raise ValueError(f"expected a list of {len(EVIDENCE)} numbers")
+    return evidence
+
+
+async def handle(scorer, reader, writer):
+    """
+    Answer the requests of one connection, one JSON line per request.
+
+    A request is a JSON array of evidence values, answered with
+    {"label": 0 or 1}, or the string "stats", answered with the
+    scorer's statistics. Invalid requests are answered with
+    {"error": message}.
+    """
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            start = time.perf_counter()
+            try:
+                if line.strip() == b'"stats"':
+                    response = scorer.stats()
+                else:
+                    label = await scorer.score(parse_request(line))
+                    scorer.record(time.perf_counter() - start)
+                    response = {"label": label}
+            except ValueError as error:
+                response = {"error": str(error)}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def report(scorer, interval=REPORT_INTERVAL):
+    """
+    Print the scorer's latency percentiles every `interval` seconds
+    while requests are coming in.
+    """
+    last = 0
+    while True:
+        await asyncio.sleep(interval)
+        stats = scorer.stats()
+        if stats["requests"] != last:
+            last = stats["requests"]
+            print(f"Requests: {stats['requests']}, "
+                  f"mean batch: {stats['mean_batch']:.1f}, "
+                  f"p50: {stats['p50_ms']:.2f} ms, "
+                  f"p99: {stats['p99_ms']:.2f} ms", flush=True)
+
+
+async def serve(model, socket=None, port=8000, max_batch=MAX_BATCH,
+                max_delay=MAX_DELAY):
+    """
+    Serve predictions of `model` on the Unix socket `socket`, or on
+    `port` of localhost if `socket` is None, until cancelled.
+    """
+    scorer = Scorer(model, max_batch, max_delay)
+
+    async def handler(reader, writer):
+        await handle(scorer, reader, writer)
+
+    if socket is not None:
+        server = await asyncio.start_unix_server(handler, path=socket)
+        print(f"Serving on {socket}", flush=True)
+    else:
+        server = await asyncio.start_server(handler, "127.0.0.1", port)
+        print(f"Serving on 127.0.0.1:{port}", flush=True)
+
+    tasks = [asyncio.create_task(scorer.run()),
+             asyncio.create_task(report(scorer))]
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Serve shopping predictions from a saved model."
+    )
+    parser.add_argument("model", help="model file written by model.py")
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket path (default: TCP on localhost)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-delay-ms", type=float,
+                        default=1000 * MAX_DELAY)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    try:
+        asyncio.run(serve(
+            model, socket=args.socket, port=args.port,
+            max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import csv
 import sys
 import calendar
 
+import numpy as np
+
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
 
@@ -11,17 +13,27 @@ TEST_SIZE = 0.4
 def main():
 
     # Check command-line arguments
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python shopping.py data")
+    if len(sys.argv) not in [2, 3] or sys.argv[2:] not in [[], ["--indexed"]]:
+        sys.exit("Usage: python shopping.py data [--indexed]")
 
     # Load data from spreadsheet and split into train and test sets
-    evidence, labels = load_data(sys.argv[1])
+    indexed = "--indexed" in sys.argv
+    if indexed:
+        from columns import load_arrays
+        evidence, labels = load_arrays(sys.argv[1])
+    else:
+        evidence, labels = load_data(sys.argv[1])
     X_train, X_test, y_train, y_test = train_test_split(
         evidence, labels, test_size=TEST_SIZE
     )
 
-    # Train model and make predictions
-    model = train_model(X_train, y_train)
+    # Train model and make predictions, with the standardized tree-indexed
+    # model if requested
+    if indexed:
+        from model import train_indexed_model
+        model = train_indexed_model(X_train, y_train)
+    else:
+        model = train_model(X_train, y_train)
     predictions = model.predict(X_test)
     sensitivity, specificity = evaluate(y_test, predictions)
 
@@ -126,25 +138,13 @@ def evaluate(labels, predictions):
     representing the "true negative rate": the proportion of
     actual negative labels that were accurately identified.
     """
-    sensitivity, specificity = 0.0, 0.0
-    positive, negative = 0.0, 0.0
-
-    for label, prediction in zip(labels, predictions):
-        if label == 1:
-            positive += 1
-            if label == prediction:
-                sensitivity += 1
-
-        else:
-            negative += 1
-            if label == prediction:
-                specificity += 1
-
-    sensitivity /= positive
-    specificity /= negative
-
+    labels = np.asarray(labels)
+    predictions = np.asarray(predictions)
+    positive = labels == 1
 
-    return sensitivity, specificity
+    sensitivity = (predictions[positive] == 1).mean()
+    specificity = (predictions[~positive] == 0).mean()
+    return float(sensitivity), float(specificity)
 
 
 if __name__ == "__main__":
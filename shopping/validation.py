@@ -0,0 +1,136 @@
+import argparse
+import multiprocessing
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+from columns import load_arrays
+from model import train_indexed_model
+from shopping import train_model
+
+# Metrics reported for each fold
+METRICS = ["sensitivity", "specificity", "accuracy", "precision"]
+
+# Data shared by the fold workers, set once per worker process
+worker_data = None
+
+
+def confusion(labels, predictions):
+    """
+    Return the confusion matrix of 0/1 `labels` and `predictions` as a
+    tuple (true positives, false negatives, false positives, true
+    negatives).
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    predictions = np.asarray(predictions, dtype=np.int64)
+    counts = np.bincount(2 * (1 - labels) + (1 - predictions), minlength=4)
+    return tuple(int(count) for count in counts)
+
+
+def scores(labels, predictions):
+    """
+    Return a dict with the sensitivity, specificity, accuracy and
+    precision of `predictions` against `labels`. A rate whose
+    denominator is zero is NaN.
+    """
+    tp, fn, fp, tn = confusion(labels, predictions)
+
+    def rate(numerator, denominator):
+        return numerator / denominator if denominator else float("nan")
+
+    return {
+        "sensitivity": rate(tp, tp + fn),
+        "specificity": rate(tn, tn + fp),
+        "accuracy": rate(tp + tn, tp + fn + fp + tn),
+        "precision": rate(tp, tp + fp),
+    }
+
+
+def load_worker(evidence, labels, indexed, params):
+    """
+    Keep the data and model settings in a worker process.
+    """
+    global worker_data
+    worker_data = (evidence, labels, indexed, params)
+
+
+def run_fold(fold):
+    """
+    Train on all rows but those in the fold `fold`, a pair (train, test)
+    of index arrays, and return the scores on the test rows.
+    """
+    evidence, labels, indexed, params = worker_data
+    train, test = fold
+    if indexed:
+        model = train_indexed_model(evidence[train], labels[train], **params)
+    else:
+        model = train_model(evidence[train], labels[train])
+    return scores(labels[test], model.predict(evidence[test]))
+
+
+def cross_validate(evidence, labels, folds=10, workers=None, seed=0,
+                   indexed=True, **params):
+    """
+    Estimate the model's metrics by stratified `folds`-fold
+    cross-validation, training and evaluating the folds across a pool
+    of `workers` processes.
+
+    The indexed model is trained with `params`, or the model of
+    `train_model` if `indexed` is False. Return a dict from each metric
+    to a tuple (mean, variance) over the folds.
+    """
+    evidence = np.asarray(evidence, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.int8)
+    splits = list(
+        StratifiedKFold(folds, shuffle=True, random_state=seed)
+        .split(evidence, labels)
+    )
+
+    if workers == 1:
+        load_worker(evidence, labels, indexed, params)
+        results = list(map(run_fold, splits))
+    else:
+        with multiprocessing.Pool(
+            workers, initializer=load_worker,
+            initargs=(evidence, labels, indexed, params)
+        ) as pool:
+            results = pool.map(run_fold, splits)
+
+    summary = dict()
+    for metric in METRICS:
+        values = np.array([result[metric] for result in results])
+        summary[metric] = (float(values.mean()), float(values.var(ddof=1)))
+    return summary
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Cross-validate the shopping model."
+    )
+    parser.add_argument("data")
+    parser.add_argument("-k", "--folds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--neighbors", type=int, default=1)
+    parser.add_argument("--plain", action="store_true",
+                        help="use the unscaled model of train_model")
+    args = parser.parse_args()
+
+    evidence, labels = load_arrays(args.data)
+    params = dict() if args.plain else {"n_neighbors": args.neighbors}
+    summary = cross_validate(
+        evidence, labels, folds=args.folds, workers=args.workers,
+        seed=args.seed, indexed=not args.plain, **params
+    )
+
+    print(f"Folds: {args.folds}")
+    for metric in METRICS:
+        mean, variance = summary[metric]
+        print(f"{metric.capitalize()}: mean {mean:.4f}, "
+              f"variance {variance:.6f}")
+
+
+if __name__ == "__main__":
+    main()
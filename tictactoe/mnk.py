@@ -0,0 +1,306 @@
+"""
+m,n,k-game Player: tic tac toe on any board size with k in a row to win
+"""
+import sys
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Cells taken by X and O are stored as these values
+PLAYERS = {X: 0, O: 1}
+
+# The four line directions: across, down and the two diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class Timeout(Exception):
+    pass
+
+
+class MNKGame():
+
+    def __init__(self, height=15, width=15, k=5):
+        """
+        Initialize an empty `height` x `width` board on which a player
+        needs `k` cells in a row to win.
+
+        Every run of `k` cells along a line is a window. For each window
+        the game keeps how many cells each player holds in it, so that
+        win detection and the heuristic evaluation only need to look at
+        the windows through the last move.
+        """
+        self.height = height
+        self.width = width
+        self.k = k
+        self.cells = [EMPTY] * (height * width)
+        self.history = []
+        self.winner = None
+
+        # Windows, and the windows that pass through each cell
+        self.windows = []
+        self.cell_windows = [[] for _ in self.cells]
+        for i in range(height):
+            for j in range(width):
+                for di, dj in DIRECTIONS:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < height and 0 <= end_j < width:
+                        w = len(self.windows)
+                        cells = [(i + di * s) * width + j + dj * s
+                                 for s in range(k)]
+                        self.windows.append(cells)
+                        for cell in cells:
+                            self.cell_windows[cell].append(w)
+        self.counts = [[0, 0] for _ in self.windows]
+
+        # Heuristic value of a window holding c cells of only one player
+        self.win_score = 10 ** (k + 2)
+        self.weights = [0] + [10 ** (c - 1) for c in range(1, k)]
+        self.weights.append(self.win_score)
+        self.score = 0
+
+        # Number of taken cells near each cell, and the empty cells
+        # with at least one taken neighbor
+        self.near = [0] * len(self.cells)
+        self.frontier = set()
+
+    def player(self):
+        """
+        Returns player who has the next turn.
+        """
+        return X if len(self.history) % 2 == 0 else O
+
+    def terminal(self):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner is not None or len(self.history) == len(self.cells)
+
+    def window_value(self, w):
+        """
+        Returns the heuristic value of window `w` for X.
+        """
+        x, o = self.counts[w]
+        if x and o:
+            return 0
+        return self.weights[x] - self.weights[o]
+
+    def move(self, cell):
+        """
+        Make the move `cell`, a tuple `(i, j)`, for the current player.
+        """
+        i, j = cell
+        if not (0 <= i < self.height and 0 <= j < self.width):
+            raise Exception("not a valid action")
+        self.play(i * self.width + j)
+
+    def play(self, index):
+        """
+        Take the cell with flat index `index` for the current player.
+        """
+        if self.cells[index] is not EMPTY or self.winner is not None:
+            raise Exception("not a valid action")
+        current = self.player()
+        p = PLAYERS[current]
+        self.cells[index] = current
+        self.history.append(index)
+
+        # Only the windows through the new cell change
+        for w in self.cell_windows[index]:
+            self.score -= self.window_value(w)
+            self.counts[w][p] += 1
+            self.score += self.window_value(w)
+            if self.counts[w][p] == self.k:
+                self.winner = current
+
+        self.frontier.discard(index)
+        for neighbor in self.neighbors(index):
+            self.near[neighbor] += 1
+            if self.cells[neighbor] is EMPTY:
+                self.frontier.add(neighbor)
+
+    def undo(self):
+        """
+        Take back the last move.
+        """
+        index = self.history.pop()
+        p = PLAYERS[self.cells[index]]
+        self.cells[index] = EMPTY
+        self.winner = None
+
+        for w in self.cell_windows[index]:
+            self.score -= self.window_value(w)
+            self.counts[w][p] -= 1
+            self.score += self.window_value(w)
+
+        for neighbor in self.neighbors(index):
+            self.near[neighbor] -= 1
+            if self.near[neighbor] == 0:
+                self.frontier.discard(neighbor)
+        if self.near[index]:
+            self.frontier.add(index)
+
+    def neighbors(self, index):
+        """
+        Returns the flat indexes of the cells around `index`.
+        """
+        i, j = divmod(index, self.width)
+        return [
+            r * self.width + c
+            for r in range(max(0, i - 1), min(self.height, i + 2))
+            for c in range(max(0, j - 1), min(self.width, j + 2))
+            if (r, c) != (i, j)
+        ]
+
+    def candidates(self):
+        """
+        Returns the flat indexes of the cells worth considering,
+        best first: empty cells next to a taken cell, ordered by how
+        much they build on the current player's windows and block
+        the opponent's.
+        """
+        if not self.history:
+            return [(self.height // 2) * self.width + self.width // 2]
+
+        p = PLAYERS[self.player()]
+        q = 1 - p
+
+        def urgency(index):
+            total = 0
+            for w in self.cell_windows[index]:
+                counts = self.counts[w]
+                if not counts[q]:
+                    total += self.weights[counts[p] + 1] * 2
+                if not counts[p]:
+                    total += self.weights[counts[q] + 1]
+            return total
+
+        return sorted(self.frontier, key=urgency, reverse=True)
+
+
+def best_move(game, time_limit=0.1, breadth=12, max_depth=None):
+    """
+    Returns the best move `(i, j)` for the current player found within
+    `time_limit` seconds, or None if the game is over.
+
+    Uses iterative deepening with alpha-beta search over the `breadth`
+    most urgent candidate cells at each node, scoring unfinished
+    positions with the window heuristic.
+    """
+    if game.terminal():
+        return None
+
+    # Leave a little of the budget for unwinding the search
+    deadline = time.perf_counter() + 0.95 * time_limit
+    moves = game.candidates()
+    best = moves[0]
+    empty = len(game.cells) - len(game.history)
+    max_depth = min(max_depth or empty, empty)
+
+    for depth in range(1, max_depth + 1):
+        try:
+            value, move = search_root(game, moves, depth, breadth, deadline)
+        except Timeout:
+            break
+        best = move
+
+        # Search the best move first at the next depth
+        moves.remove(move)
+        moves.insert(0, move)
+        if abs(value) >= game.win_score // 2:
+            break
+
+    return divmod(best, game.width)
+
+
+def search_root(game, moves, depth, breadth, deadline):
+    """
+    Returns the pair (value, move) of the best of `moves` searched to
+    `depth` moves ahead.
+    """
+    alpha = -game.win_score * 2
+    beta = game.win_score * 2
+    best_move = None
+    for move in moves[:breadth]:
+        game.play(move)
+        try:
+            value = -negamax(game, depth - 1, -beta, -alpha, breadth, deadline)
+        finally:
+            game.undo()
+        if best_move is None or value > alpha:
+            best_move = move
+            alpha = value
+    return alpha, best_move
+
+
+def negamax(game, depth, alpha, beta, breadth, deadline):
+    """
+    Returns the value of the game for the player to move, searching
+    `depth` moves ahead within the window (alpha, beta).
+    """
+    if time.perf_counter() > deadline:
+        raise Timeout
+
+    sign = 1 if game.player() == X else -1
+    if game.winner is not None:
+
+        # The previous player won; prefer quicker wins and slower losses
+        return -game.win_score - depth
+    if len(game.history) == len(game.cells):
+        return 0
+    if depth == 0:
+        return sign * game.score
+
+    best = -game.win_score * 2
+    for move in game.candidates()[:breadth]:
+        game.play(move)
+        try:
+            value = -negamax(game, depth - 1, -beta, -alpha, breadth, deadline)
+        finally:
+            game.undo()
+        best = max(best, value)
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+    return best
+
+
+def main():
+
+    # Check command-line arguments
+    if len(sys.argv) not in [1, 4]:
+        sys.exit("Usage: python mnk.py [height width k]")
+    if len(sys.argv) == 4:
+        height, width, k = (int(arg) for arg in sys.argv[1:])
+    else:
+        height, width, k = 15, 15, 5
+
+    game = MNKGame(height, width, k)
+    human = X
+
+    while not game.terminal():
+        for i in range(height):
+            print(" ".join(
+                game.cells[i * width + j] or "." for j in range(width)
+            ))
+        print()
+
+        if game.player() == human:
+            try:
+                i = int(input("Row: "))
+                j = int(input("Column: "))
+                game.move((i, j))
+            except Exception:
+                print("Invalid move, try again.")
+        else:
+            start = time.perf_counter()
+            move = best_move(game)
+            game.move(move)
+            elapsed = 1000 * (time.perf_counter() - start)
+            print(f"AI played {move} in {elapsed:.0f} ms")
+
+    print("Game over: " + (f"{game.winner} wins" if game.winner else "tie"))
+
+
+if __name__ == "__main__":
+    main()
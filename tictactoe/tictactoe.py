@@ -1,13 +1,77 @@
 """
 Tic Tac Toe Player
 """
+import hashlib
 import math
-import copy
+import os
+import random
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cells are numbered 0-8 row by row. Every line of three cells
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6)]
+
+# The 8 rotations and reflections of the board, as the cell that
+# moves into each position
+SYMMETRIES = [(0, 1, 2, 3, 4, 5, 6, 7, 8),
+              (6, 3, 0, 7, 4, 1, 8, 5, 2),
+              (8, 7, 6, 5, 4, 3, 2, 1, 0),
+              (2, 5, 8, 1, 4, 7, 0, 3, 6),
+              (2, 1, 0, 5, 4, 3, 8, 7, 6),
+              (6, 7, 8, 3, 4, 5, 0, 1, 2),
+              (0, 3, 6, 1, 4, 7, 2, 5, 8),
+              (8, 5, 2, 7, 4, 1, 6, 3, 0)]
+
+# Center first, then corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Bitboards: bit k of a 9-bit integer is set if a player holds cell k.
+# A position is a pair (x, o) of bitboards
+FULL = (1 << 9) - 1
+LINE_MASKS = [sum(1 << k for k in line) for line in LINES]
+
+# Whether each of the 512 bitboards contains a complete line
+WINS = [any(bits & mask == mask for mask in LINE_MASKS)
+        for bits in range(FULL + 1)]
+
+# Each symmetry applied to each of the 512 bitboards
+SYMMETRY_TABLES = [
+    [sum(1 << k for k, cell in enumerate(symmetry) if bits >> cell & 1)
+     for bits in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+
+# Base-3 value of each bitboard, so that a position (x, o) has the
+# index TERNARY[x] + 2 * TERNARY[o] among all 3^9 boards
+TERNARY = [sum(3 ** k for k in range(9) if bits >> k & 1)
+           for bits in range(FULL + 1)]
+
+# Policy table file: magic bytes, SHA-256 of the table, then one byte
+# per board index holding the optimal cell, or NO_MOVE
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "policy.bin")
+POLICY_MAGIC = b"TTTP1"
+NO_MOVE = 255
+
+# Number of random positions checked against the search on load
+POLICY_CHECKS = 64
+
+# Loaded policy table, False until loading has been attempted
+policy = False
+
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps a canonical position to a (value, kind) pair, where the value
+# is from the point of view of the player to move
+transpositions = dict()
+
 
 def initial_state():
     """
@@ -18,150 +82,366 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
-def player(board):
+def to_bits(board):
     """
-    Returns player who has the next turn on a board.
+    Returns the bitboards (x, o) of a list board.
     """
-    # iterate over the board and check how many Xs Or Os are on the board yet
-    count_X = 0
-    count_O = 0
-
-    for row in range(len(board)):
-        for col in range(len(board[row])):
+    x = o = 0
+    for row in range(3):
+        for col in range(3):
             if board[row][col] == X:
-                count_X += 1
+                x |= 1 << (3 * row + col)
             elif board[row][col] == O:
-                count_O += 1
-    if count_X > count_O:
-        return O
-    else:
+                o |= 1 << (3 * row + col)
+    return x, o
+
+
+def from_bits(x, o):
+    """
+    Returns the list board of the bitboards (x, o).
+    """
+    return [[X if x >> (3 * row + col) & 1
+             else O if o >> (3 * row + col) & 1
+             else EMPTY
+             for col in range(3)]
+            for row in range(3)]
+
+
+def bits_player(x, o):
+    """
+    Returns player who has the next turn in position (x, o).
+    """
+    return O if x.bit_count() > o.bit_count() else X
+
+
+def bits_actions(x, o):
+    """
+    Returns the list of empty cells 0-8 in position (x, o).
+    """
+    free = FULL & ~(x | o)
+    return [k for k in range(9) if free >> k & 1]
+
+
+def bits_result(x, o, k):
+    """
+    Returns the position that results from the current player taking
+    cell `k` in position (x, o).
+    """
+    if (x | o) >> k & 1:
+        raise Exception("not a valid action")
+    if bits_player(x, o) == X:
+        return x | 1 << k, o
+    return x, o | 1 << k
+
+
+def bits_winner(x, o):
+    """
+    Returns the winner of position (x, o), if there is one.
+    """
+    if WINS[x]:
         return X
+    elif WINS[o]:
+        return O
+    return None
+
+
+def bits_terminal(x, o):
+    """
+    Returns True if the game is over in position (x, o).
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def bits_utility(x, o):
+    """
+    Returns 1 if X has won in position (x, o), -1 if O has won,
+    0 otherwise.
+    """
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return bits_player(*to_bits(board))
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    # check if a cell on the board is NONE-type and return that coordinate as a set
-    actions_possible = set()
-    for row in range(len(board)):
-        for col in range(len(board[0])):
-            if board[row][col] == EMPTY:
-                actions_possible.add((row, col))
-    return actions_possible
+    return set(divmod(k, 3) for k in bits_actions(*to_bits(board)))
+
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if action not in actions(board):
-        raise Exception("not a valid action")
-
     row, col = action
-    board_copy = copy.deepcopy(board)
-    board_copy[row][col] = player(board)
-    return board_copy
+    if not (0 <= row < 3 and 0 <= col < 3):
+        raise Exception("not a valid action")
+    return from_bits(*bits_result(*to_bits(board), 3 * row + col))
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    if check_row(board, X) or check_column(board, X) or check_diagonal(board, X):
-        return X
-    elif check_row(board, O) or check_column(board, O) or check_diagonal(board, O):
-        return O
-    else:
-        return None
+    return bits_winner(*to_bits(board))
 
-def check_row(board, player):
-    for row in range(len(board)):
-        if board[row][0] == player and board[row][1] == player and board[row][2] == player:
-            return True
-    return False
-
-def check_column(board,player):
-    for col in range(len(board)):
-        if board[0][col] == player and board[1][col] == player and board[2][col] == player:
-            return True
-    return False
-
-def check_diagonal(board, player):
-    count1 = 0
-    count2 = 0
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            if row == col and board[row][col] == player:
-                count1 +=1
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            if (len(board) - row - 1) == col and board[row][col] == player:
-                count2 +=1
-    if count1 == 3:
-        return True
-    elif count2 == 3:
-        return True
-    else:
-        return False
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) == X:
-        return True
-    elif winner(board) == O:
-        return True
-    for row in range (len(board)):
-        for col in range(len(board[row])):
-            if board[row][col] == EMPTY:
-                return False
-    return True
+    return bits_terminal(*to_bits(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bits_utility(*to_bits(board))
+
 
 def max_function(board):
+    return max_value(*to_bits(board))
+
+
+def min_function(board):
+    return min_value(*to_bits(board))
+
+
+def max_value(x, o):
+    if bits_terminal(x, o):
+        return bits_utility(x, o)
     v = -math.inf
-    if terminal(board):
-        return utility(board)
-    for action in actions(board):
-        v = max(v, min_function(result(board, action)))
+    for k in bits_actions(x, o):
+        v = max(v, min_value(x | 1 << k, o))
     return v
 
-def min_function(board):
+
+def min_value(x, o):
+    if bits_terminal(x, o):
+        return bits_utility(x, o)
     v = math.inf
-    if terminal(board):
-        return utility(board)
-    for action in actions(board):
-        v = min(v, max_function(result(board, action)))
+    for k in bits_actions(x, o):
+        v = min(v, max_value(x, o | 1 << k))
     return v
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+
+    Answers from the precomputed policy table when it is available,
+    and otherwise searches with `alphabeta`.
+    """
+    x, o = to_bits(board)
+    if bits_terminal(x, o):
+        return None
+
+    table = load_policy()
+    if table is not None:
+        move = table[TERNARY[x] + 2 * TERNARY[o]]
+        if move != NO_MOVE:
+            return divmod(move, 3)
+    return alphabeta(board)
+
+
+def minimax_search(board):
     """
-    if terminal(board):
+    Returns the optimal action for the current player on the board,
+    found by a full minimax search.
+    """
+    x, o = to_bits(board)
+    if bits_terminal(x, o):
         return None
 
-    elif player(board) == X:
+    elif bits_player(x, o) == X:
         plays = []
-        for action in actions(board):
-            plays.append([min_function(result(board,action)), action])
+        for k in bits_actions(x, o):
+            plays.append([min_value(x | 1 << k, o), divmod(k, 3)])
         return sorted(plays, key=lambda x: x[0], reverse=True)[0][1]
 
-    elif player(board) == O:
+    else:
         plays = []
-        for action in actions(board):
-            plays.append([max_function(result(board,action)), action])
-        return sorted(plays, key=lambda x: x[0])[0][1]
\ No newline at end of file
+        for k in bits_actions(x, o):
+            plays.append([max_value(x, o | 1 << k), divmod(k, 3)])
+        return sorted(plays, key=lambda x: x[0])[0][1]
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Gives an action of the same value as `minimax`, using alpha-beta
+    pruning with move ordering and a transposition table shared by
+    all positions equal up to rotation and reflection.
+    """
+    x, o = to_bits(board)
+    if bits_terminal(x, o):
+        return None
+
+    me, them = (x, o) if bits_player(x, o) == X else (o, x)
+    free = FULL & ~(x | o)
+
+    best_action = None
+    best_value = -2
+    for k in MOVE_ORDER:
+        if free >> k & 1:
+            value = -negamax(them, me | 1 << k, -1, -best_value)
+            if value > best_value:
+                best_action = divmod(k, 3)
+                best_value = value
+                if best_value == 1:
+                    break
+    return best_action
+
+
+def negamax(me, them, alpha, beta):
+    """
+    Returns the value of the position for the player to move, who holds
+    bitboard `me` against `them`. The value is 1 for a win, -1 for a
+    loss and 0 for a draw, searching within the window (alpha, beta).
+    """
+    key = min(table[me] << 9 | table[them] for table in SYMMETRY_TABLES)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, kind = entry
+        if kind == EXACT:
+            return value
+        elif kind == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    # The previous player may have just completed a line
+    if WINS[them]:
+        transpositions[key] = (-1, EXACT)
+        return -1
+    free = FULL & ~(me | them)
+    if not free:
+        transpositions[key] = (0, EXACT)
+        return 0
+
+    original_alpha = alpha
+    best = -2
+    for k in MOVE_ORDER:
+        if free >> k & 1:
+            value = -negamax(them, me | 1 << k, -beta, -alpha)
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+    if best <= original_alpha:
+        transpositions[key] = (best, UPPER)
+    elif best >= beta:
+        transpositions[key] = (best, LOWER)
+    else:
+        transpositions[key] = (best, EXACT)
+    return best
+
+
+def build_policy():
+    """
+    Solves every position reachable from the initial state with
+    `alphabeta` and returns the policy table as bytes.
+    """
+    table = bytearray([NO_MOVE]) * 3 ** 9
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        index = TERNARY[x] + 2 * TERNARY[o]
+        if index in seen or bits_terminal(x, o):
+            continue
+        seen.add(index)
+        i, j = alphabeta(from_bits(x, o))
+        table[index] = 3 * i + j
+        for k in bits_actions(x, o):
+            stack.append(bits_result(x, o, k))
+    return bytes(table)
+
+
+def save_policy(table, filename=POLICY_FILE):
+    """
+    Writes a policy table to `filename` with its checksum.
+    """
+    with open(filename, "wb") as f:
+        f.write(POLICY_MAGIC)
+        f.write(hashlib.sha256(table).digest())
+        f.write(table)
+
+
+def load_policy(filename=POLICY_FILE):
+    """
+    Returns the policy table stored in `filename`, or None if it is
+    missing or fails its integrity check. The file is read once.
+
+    The check compares the stored checksum and verifies that the moves
+    for a sample of positions have the same value as the moves found
+    by `alphabeta`.
+    """
+    global policy
+    if policy is not False and filename == POLICY_FILE:
+        return policy
+
+    table = None
+    if os.path.exists(filename):
+        with open(filename, "rb") as f:
+            data = f.read()
+        header = len(POLICY_MAGIC) + 32
+        if (data[:len(POLICY_MAGIC)] == POLICY_MAGIC
+                and len(data) == header + 3 ** 9
+                and hashlib.sha256(data[header:]).digest()
+                == data[len(POLICY_MAGIC):header]
+                and check_policy(data[header:])):
+            table = data[header:]
+
+    if filename == POLICY_FILE:
+        policy = table
+    return table
+
+
+def check_policy(table, checks=POLICY_CHECKS):
+    """
+    Returns True if the table's moves for `checks` random positions
+    are as good as the moves chosen by `alphabeta`.
+    """
+    indexes = [index for index, move in enumerate(table) if move != NO_MOVE]
+    for index in random.sample(indexes, min(checks, len(indexes))):
+        move = table[index]
+        x = o = 0
+        for k in range(9):
+            index, cell = divmod(index, 3)
+            if cell == 1:
+                x |= 1 << k
+            elif cell == 2:
+                o |= 1 << k
+        board = from_bits(x, o)
+        if move not in bits_actions(x, o):
+            return False
+        if move_value(board, move) != move_value(board, alphabeta(board)):
+            return False
+    return True
+
+
+def move_value(board, move):
+    """
+    Returns the value for the player to move of taking `move`, given as
+    a cell 0-8 or a tuple (i, j), on the board.
+    """
+    if isinstance(move, tuple):
+        move = 3 * move[0] + move[1]
+    x, o = to_bits(board)
+    me, them = (x, o) if bits_player(x, o) == X else (o, x)
+    return -negamax(them, me | 1 << move, -1, 1)
+
+
+if __name__ == "__main__":
+    save_policy(build_policy())